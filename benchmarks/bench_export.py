@@ -0,0 +1,81 @@
+"""
+Benchmark of the export row access: DataFrame.iterrows() vs column-wise.
+
+Usage:
+    python benchmarks/bench_export.py --rows 100000
+"""
+
+import io
+import math
+import time
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+from doctomood.ioutils import ANSWER_COLUMNS, _correct_indices, _str_column, df_to_xml
+from doctomood.questions import COLUMNS
+
+
+def make_frame(n_rows):
+    rows = []
+    for i in range(n_rows):
+        correct = i % 5 - 1  # -1 (no answer) to 3
+        rows.append(
+            (
+                f"Question {i} <with> markup & entities?",
+                *(f"Answer {j} of {i}" for j in range(4)),
+                correct,
+                "Explicacion: extra" if i % 3 == 0 else "",
+            )
+        )
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def iterrows_row_access(df):
+    """Row access of df_to_docx/df_to_xml before the column-wise rewrite."""
+    out = []
+    for i, row in df.iterrows():
+        correct_val = row["correct"]
+        highlight_index = None
+        if isinstance(correct_val, (int, float)) and not math.isnan(correct_val):
+            correct_int = int(correct_val)
+            if 0 <= correct_int <= 3:
+                highlight_index = 1 + correct_int
+        texts = [escape(str(row["question"]))]
+        texts.extend(str(row[col]) for col in ANSWER_COLUMNS)
+        out.append((texts, highlight_index))
+    return out
+
+
+def columnar_row_access(df):
+    columns = [_str_column(df[col]) for col in ["question", *ANSWER_COLUMNS]]
+    return list(zip(zip(*columns), _correct_indices(df["correct"])))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"{args.rows} rows")
+
+    old = timed(iterrows_row_access, df)
+    new = timed(columnar_row_access, df)
+    print(f"row access   iterrows {old:8.3f}s  columnar {new:8.3f}s  x{old / new:.1f}")
+
+    xml = timed(df_to_xml, df, io.StringIO())
+    print(f"df_to_xml    {xml:8.3f}s  ({args.rows / xml:,.0f} questions/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Time and peak memory of each conversion stage on synthetic question banks.
+
+Every stage runs in its own child process, so that its peak RSS is not hidden
+by an earlier stage. Peak Python allocations are measured with tracemalloc;
+the RSS figure also covers memory allocated by C extensions such as lxml.
+
+Usage:
+    python benchmarks/bench_pipeline.py --questions 1000 5000
+"""
+
+import multiprocessing
+import os
+import pickle
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from synthetic import make_question_bank
+
+
+def _read_docx(path):
+    from doctomood.ioutils import get_docx_with_highlight_mark
+
+    return get_docx_with_highlight_mark(path)
+
+
+def _read_stream(path):
+    from doctomood.ioutils import iter_docx_with_highlight_mark
+
+    return list(iter_docx_with_highlight_mark(path))
+
+
+def _process(paragraphs_path):
+    from doctomood.process import process
+
+    with open(paragraphs_path, "rb") as f:
+        paragraphs = pickle.load(f)
+    bank, _ = process(paragraphs, as_dataframe=False)
+    return bank
+
+
+def _export(writer, bank_path, output_path):
+    from doctomood import ioutils
+
+    with open(bank_path, "rb") as f:
+        bank = pickle.load(f)
+    with redirect_stdout(open(os.devnull, "w")):
+        getattr(ioutils, writer)(bank, output_path)
+
+
+def _measure(func, args, result_path, queue):
+    # Import the package up front so that import cost is not part of the stage
+    import doctomood.ioutils  # noqa: F401
+    import doctomood.process  # noqa: F401
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if result_path is not None:
+        with open(result_path, "wb") as f:
+            pickle.dump(result, f)
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    queue.put((elapsed, peak, (rss_after - rss_before) * rss_unit))
+
+
+def run_stage(func, args, result_path=None):
+    """Run func(*args) in a child process; return (seconds, peak_alloc, peak_rss)."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    child = ctx.Process(target=_measure, args=(func, args, result_path, queue))
+    child.start()
+    measurement = queue.get()
+    child.join()
+    return measurement
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--explanation-every", type=int, default=4)
+    parser.add_argument(
+        "--skip-docx-reader",
+        action="store_true",
+        help="Do not time the python-docx reader (slow on large banks)",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'questions':>9}  {'stage':28}  {'seconds':>8}  "
+        f"{'peak alloc MB':>13}  {'peak RSS +MB':>12}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for n in args.questions:
+            docx_path = tmp / f"bank_{n}.docx"
+            make_question_bank(docx_path, n, args.explanation_every)
+            paragraphs_path = tmp / "paragraphs.pkl"
+            bank_path = tmp / "bank.pkl"
+
+            stages = []
+            if not args.skip_docx_reader:
+                stages.append(
+                    ("get_docx_with_highlight_mark", _read_docx, (docx_path,), None)
+                )
+            stages += [
+                (
+                    "iter_docx_with_highlight_mark",
+                    _read_stream,
+                    (docx_path,),
+                    paragraphs_path,
+                ),
+                ("process", _process, (paragraphs_path,), bank_path),
+                (
+                    "df_to_docx",
+                    _export,
+                    ("df_to_docx", bank_path, tmp / "out.docx"),
+                    None,
+                ),
+                ("df_to_xml", _export, ("df_to_xml", bank_path, tmp / "out.xml"), None),
+            ]
+            for name, func, stage_args, result_path in stages:
+                seconds, peak, rss = run_stage(func, stage_args, result_path)
+                print(
+                    f"{n:>9}  {name:28}  {seconds:8.3f}  "
+                    f"{peak / 2**20:13.1f}  {rss / 2**20:12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
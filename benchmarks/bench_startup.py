@@ -0,0 +1,98 @@
+"""
+Cold-start time of the doctomood entry points, checked against a budget.
+
+Each measurement runs in a fresh interpreter. The import time of an entry-point
+module is read from `python -X importtime`; `doctomood --help` is timed as a
+whole. The script exits with status 1 if a budget is exceeded or if importing an
+entry point loads one of the heavy dependencies.
+
+Usage:
+    python benchmarks/bench_startup.py --budget-ms 100 --help-budget-ms 250
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+ENTRY_POINTS = ["doctomood.main", "doctomood.gui"]
+HEAVY_MODULES = ["docx", "pandas", "yaml", "lxml"]
+
+
+def import_time_ms(module):
+    """Return the cumulative import time of module in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def loaded_heavy_modules(module):
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def help_time_ms():
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "doctomood.main", "--help"],
+        capture_output=True,
+        check=True,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def importable(module):
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {module}"], capture_output=True
+    )
+    return result.returncode == 0
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=100)
+    parser.add_argument("--help-budget-ms", type=float, default=250)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    for module in ENTRY_POINTS:
+        if not importable(module):
+            print(f"{module:16s} skipped (not importable here)")
+            continue
+        ms = statistics.median(import_time_ms(module) for _ in range(args.repeat))
+        heavy = loaded_heavy_modules(module)
+        print(f"{module:16s} import {ms:7.1f} ms  heavy modules: {heavy or 'none'}")
+        if ms > args.budget_ms:
+            failures.append(f"{module} import {ms:.1f} ms > {args.budget_ms} ms")
+        if heavy:
+            failures.append(f"{module} loads {', '.join(heavy)} at import")
+
+    ms = statistics.median(help_time_ms() for _ in range(args.repeat))
+    print(f"{'doctomood --help':16s} wall   {ms:7.1f} ms")
+    if ms > args.help_budget_ms:
+        failures.append(f"doctomood --help {ms:.1f} ms > {args.help_budget_ms} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Synthetic DOCX question banks for the benchmarks.
+
+Usage:
+    python benchmarks/synthetic.py bank.docx --questions 5000
+"""
+
+import random
+from argparse import ArgumentParser
+
+LETTERS = "abcd"
+STYLES = ["highlight", "checkmark", "space_only"]
+
+
+def make_question_bank(path, n_questions=1000, explanation_every=4, seed=0):
+    """
+    Write a DOCX with n_questions multiple-choice questions.
+
+    Questions rotate between the supported correct-answer styles: highlighted
+    answer runs with "a)" labels, a leading checkmark on unlabeled answers, and
+    highlighted answers with space-only "a " labels. Every explanation_every-th
+    question is followed by a separate "Explicación" block.
+    """
+    import docx
+    from docx.enum.text import WD_COLOR_INDEX
+
+    rnd = random.Random(seed)
+    doc = docx.Document()
+
+    for i in range(1, n_questions + 1):
+        style = STYLES[i % len(STYLES)]
+        correct = rnd.randrange(len(LETTERS))
+        doc.add_paragraph(f"{i}. ¿Cuál de las siguientes opciones es correcta ({i})?")
+
+        for j, letter in enumerate(LETTERS):
+            text = f"Respuesta {letter.upper()} de la pregunta {i}"
+            paragraph = doc.add_paragraph()
+            if style == "checkmark":
+                paragraph.add_run(("✔" if j == correct else "") + text)
+                continue
+            label = f"{letter} " if style == "space_only" else f"{letter}) "
+            paragraph.add_run(label)
+            run = paragraph.add_run(text)
+            if j == correct:
+                run.font.highlight_color = WD_COLOR_INDEX.YELLOW
+
+        if explanation_every and i % explanation_every == 0:
+            doc.add_paragraph("")
+            doc.add_paragraph(
+                f"Explicación: la respuesta {LETTERS[correct]} es la correcta."
+            )
+
+        doc.add_paragraph("")
+
+    doc.save(path)
+    return path
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--explanation-every", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    make_question_bank(args.output, args.questions, args.explanation_every, args.seed)
+    print(f"Saved {args.questions} questions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
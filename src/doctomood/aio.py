@@ -0,0 +1,110 @@
+# asyncio API, for converting documents from an event loop without blocking it.
+#
+# Parsing and XML rendering are CPU-bound: they run in an executor (the loop's
+# default thread pool, or e.g. a ProcessPoolExecutor for parallelism), and an
+# AsyncConverter bounds how many of them run at a time.
+
+import asyncio
+import os
+
+from doctomood.ioutils import XmlWriter, render_xml
+from doctomood.questions import QuestionBank
+
+# Questions rendered per executor call when streaming Moodle XML
+CHUNK_QUESTIONS = 256
+
+
+def _convert(source, extra_content_words, answer_labels):
+    from doctomood.process import process_docx
+
+    return process_docx(
+        source,
+        as_dataframe=False,
+        extra_content_words=extra_content_words,
+        answer_labels=answer_labels,
+    )
+
+
+class AsyncConverter:
+    """
+    Convert DOCX files from asyncio code.
+
+    At most max_concurrency parsing or rendering jobs (default: the number of
+    CPUs) run at a time in executor; the other calls wait for a free slot
+    without blocking the event loop. executor is None for the loop's default
+    executor; a ProcessPoolExecutor parses several documents in parallel
+    (sources are then pickled to the workers: pass paths or bytes, not file
+    objects or memoryviews).
+
+    Example:
+        converter = AsyncConverter(max_concurrency=4)
+        bank = await converter.convert(docx_bytes)
+        async for chunk in converter.iter_xml(bank):
+            await response.write(chunk)
+    """
+
+    def __init__(
+        self,
+        max_concurrency=None,
+        executor=None,
+        extra_content_words=None,
+        chunk_questions=CHUNK_QUESTIONS,
+        answer_labels=None,
+    ):
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.executor = executor
+        self.extra_content_words = extra_content_words
+        self.answer_labels = answer_labels
+        self.chunk_questions = chunk_questions
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    async def _run(self, func, *args):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    async def convert(self, source):
+        """Parse a DOCX file into a QuestionBank (see process_docx())."""
+        return await self._run(
+            _convert, source, self.extra_content_words, self.answer_labels
+        )
+
+    async def iter_xml(self, source):
+        """
+        Yield the Moodle XML of a document as UTF-8 chunks.
+
+        source is a DOCX path, bytes or binary file object, or already parsed
+        questions (QuestionBank or DataFrame). Each chunk holds the XML of
+        chunk_questions questions, rendered in the executor; the chunks
+        joined together are the output of write_xml().
+        """
+        if isinstance(source, QuestionBank) or hasattr(source, "columns"):
+            bank = source
+        else:
+            bank = await self.convert(source)
+
+        yield XmlWriter.HEADER.encode("utf-8")
+        for start in range(0, len(bank), self.chunk_questions):
+            chunk = bank[start : start + self.chunk_questions]
+            yield await self._run(render_xml, chunk, start)
+        yield XmlWriter.FOOTER.encode("utf-8")
+
+    async def to_xml(self, source):
+        """Return the Moodle XML of a document (see iter_xml()) as bytes."""
+        return b"".join([chunk async for chunk in self.iter_xml(source)])
+
+
+async def convert_async(
+    source, extra_content_words=None, executor=None, answer_labels=None
+):
+    """
+    Parse a DOCX path, bytes or binary file object into a QuestionBank
+    without blocking the event loop. Use an AsyncConverter to limit how many
+    conversions run at a time.
+    """
+    converter = AsyncConverter(
+        executor=executor,
+        extra_content_words=extra_content_words,
+        answer_labels=answer_labels,
+    )
+    return await converter.convert(source)
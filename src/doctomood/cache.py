@@ -0,0 +1,125 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_SUFFIX = ".pkl"
+
+
+def default_cache_dir():
+    """Return the default cache directory ($XDG_CACHE_HOME/doctomood)."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "doctomood"
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of the content of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class QuestionCache:
+    """
+    On-disk cache of parsed question rows, keyed by input content and parser version.
+
+    Each entry is a pickle file in cache_dir. Entries are touched when read, so
+    their modification time doubles as the last-access time used to evict the
+    least recently used entries once the total size exceeds max_bytes.
+
+    cache_dir is scanned once, on the first put; after that the size and
+    access order of the entries are tracked in memory, so a put costs the
+    same whatever the number of entries.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = max_bytes
+        # Size of each entry, least recently used first (None until scanned)
+        self._sizes = None
+        self._total = 0
+
+    def key(self, path, version):
+        return f"{file_digest(path)}-{version}"
+
+    def _entry(self, key):
+        return self.cache_dir / f"{key}{CACHE_SUFFIX}"
+
+    def get(self, key):
+        """Return the cached rows for key, or None on a miss."""
+        entry = self._entry(key)
+        try:
+            with open(entry, "rb") as f:
+                rows = pickle.load(f)
+        except FileNotFoundError:
+            self._forget(entry)
+            return None
+        except Exception:
+            # Truncated or incompatible entry: drop it and parse again
+            entry.unlink(missing_ok=True)
+            self._forget(entry)
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        if self._sizes is not None and entry in self._sizes:
+            self._sizes.move_to_end(entry)
+        return rows
+
+    def put(self, key, rows):
+        """Store rows under key and evict old entries if the cache is too large."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            entry = self._entry(key)
+            os.replace(tmp_name, entry)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        sizes = self._index()
+        self._forget(entry)
+        sizes[entry] = size
+        self._total += size
+        self.evict()
+
+    def _index(self):
+        """Return the entry sizes in access order, scanning cache_dir the first time."""
+        if self._sizes is None:
+            entries = []
+            for entry in self.cache_dir.glob(f"*{CACHE_SUFFIX}"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, entry, stat.st_size))
+            entries.sort()
+            self._sizes = OrderedDict((entry, size) for _, entry, size in entries)
+            self._total = sum(self._sizes.values())
+        return self._sizes
+
+    def _forget(self, entry):
+        if self._sizes is not None:
+            self._total -= self._sizes.pop(entry, 0)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        sizes = self._index()
+        while self._total > self.max_bytes and sizes:
+            entry, size = sizes.popitem(last=False)
+            entry.unlink(missing_ok=True)
+            self._total -= size
+
+    def clear(self):
+        for entry in self.cache_dir.glob(f"*{CACHE_SUFFIX}"):
+            entry.unlink(missing_ok=True)
+        self._sizes = None
+        self._total = 0
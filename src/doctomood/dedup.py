@@ -0,0 +1,416 @@
+# Near-duplicate detection for merged question banks.
+#
+# Each question is reduced to the set of word bigrams ("shingles") of its
+# normalized text and answers, and the set to a MinHash signature: for each of
+# NUM_PERM hash functions, the smallest hash of its shingles. The fraction of
+# equal signature values estimates the Jaccard similarity of two sets.
+#
+# Questions with the same signature (usually copies of one question) are
+# near-duplicates right away, and only one of them goes on to the index.
+# Questions are not compared pairwise. The signatures are cut into BANDS bands
+# (locality-sensitive hashing): questions whose band values are all equal in
+# some band fall in the same bucket and are candidates. For each band the
+# questions are sorted by band key once; every pair of a bucket is a candidate,
+# except in buckets of more than MAX_BUCKET questions (usually many copies of
+# one question), where each question is paired with the next MAX_BUCKET - 1
+# only. The candidates of a band are at most n * (MAX_BUCKET - 1) pairs.
+# Candidates are confirmed on their whole signatures, and the confirmed pairs
+# are merged into components with a union-find, band by band: candidates that
+# are already in the same component are not compared again. As a chain of
+# similar questions can drift away from where it started, components are then
+# split into clusters around representatives: the first question of a component
+# is a representative, the questions similar to it join its cluster, and the
+# first of the others is the next representative, until none are left. Every
+# question of a cluster is similar to its first question.
+
+import re
+import unicodedata
+import zlib
+from itertools import islice
+
+import numpy as np
+
+from doctomood.ioutils import _as_question_bank
+from doctomood.questions import QuestionBank
+
+# Estimated Jaccard similarity from which two questions are near-duplicates
+DEDUP_THRESHOLD = 0.75
+DEDUP_MODES = ("drop", "flag")
+# Hash functions of a signature, and bands of NUM_PERM // BANDS values each
+NUM_PERM = 64
+BANDS = 16
+# Questions hashed at a time, to bound the temporary arrays
+SIGNATURE_BATCH = 4096
+# Bucket size up to which all pairs of a bucket are candidates
+MAX_BUCKET = 32
+# Candidate pairs whose signatures are compared at a time
+PAIR_BATCH = 65536
+# Clusters listed by format_clusters() by default
+REPORT_CLUSTERS = 20
+SEED = 20240229
+
+RE_COMBINING = re.compile("[\\u0300-\\u036f]")
+# Separators of the answers and of the questions in the text of a batch
+SEGMENT_END = "\x00"
+QUESTION_END = "\x01"
+RE_TOKEN = re.compile(r"\w+|[\x00\x01]")
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _hash_parameters():
+    rng = np.random.default_rng(SEED)
+    high = np.iinfo(np.uint64).max
+    multipliers = rng.integers(1, high, size=NUM_PERM, dtype=np.uint64) | 1
+    increments = rng.integers(0, high, size=NUM_PERM, dtype=np.uint64)
+    return multipliers, increments
+
+
+_MULTIPLIERS, _INCREMENTS = _hash_parameters()
+
+
+def _normalize(text):
+    """Lowercase text and remove its accents."""
+    if not text.isascii():
+        text = RE_COMBINING.sub("", unicodedata.normalize("NFKD", text))
+    return text.lower()
+
+
+class _WordHashes(dict):
+    """Memoized CRC-32 of each word: stable across runs, unlike hash()."""
+
+    def __init__(self):
+        super().__init__({SEGMENT_END: 0, QUESTION_END: 1})
+
+    def __missing__(self, word):
+        value = self[word] = zlib.crc32(word.encode("utf-8")) + 2
+        return value
+
+
+def _batch_text(questions, answers):
+    """
+    Return the text of a batch of questions: each question is followed by
+    its answers, separated by SEGMENT_END, and ends with QUESTION_END.
+    """
+    texts = []
+    for question, question_answers in zip(questions, answers):
+        text = SEGMENT_END.join((question, *question_answers))
+        texts.append(text.replace(QUESTION_END, " "))
+    texts.append("")
+    return QUESTION_END.join(texts)
+
+
+def _batch_shingles(tokens, word_hashes):
+    """
+    Return the (question index, shingle hash) of the word bigrams in a batch
+    of tokens, where a one-word segment counts as a shingle on its own.
+    Bigrams do not cross segments (the question, each answer), so the order
+    of the answers does not matter.
+    """
+    hashes = np.fromiter(
+        map(word_hashes.__getitem__, tokens), dtype=np.uint64, count=len(tokens)
+    )
+    is_word = hashes > 1
+    is_end = hashes == 1
+    question_index = np.cumsum(is_end) - is_end
+
+    bigram = is_word[:-1] & is_word[1:]
+    before = np.concatenate(([False], is_word[:-1]))
+    after = np.concatenate((is_word[1:], [False]))
+    single = is_word & ~before & ~after
+
+    first = np.concatenate((hashes[:-1][bigram], hashes[single]))
+    second = np.concatenate((hashes[1:][bigram], np.zeros(single.sum(), np.uint64)))
+    index = np.concatenate((question_index[:-1][bigram], question_index[single]))
+    shingles = (first * _SHINGLE_MULTIPLIER ^ second) * _SHINGLE_MULTIPLIER
+    order = np.argsort(index, kind="stable")
+    return index[order], shingles[order]
+
+
+def _batch_signatures(n, index, shingles):
+    """Return the signatures of a batch of n questions, and which have shingles."""
+    counts = np.bincount(index, minlength=n)
+    has_words = counts > 0
+    signatures = np.full((n, NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    if not len(shingles):
+        return signatures, has_words
+    # Multiply-shift hashing: the high 32 bits of a * x + b (mod 2**64). The
+    # minimum is taken on the full values: its high bits are the minimum ones.
+    # Hash functions are rows, so each minimum is over contiguous memory.
+    hashed = np.multiply.outer(_MULTIPLIERS, shingles)
+    hashed += _INCREMENTS[:, None]
+    starts = np.concatenate(([0], np.cumsum(counts[has_words])[:-1]))
+    minimums = np.minimum.reduceat(hashed, starts, axis=1)
+    signatures[has_words] = (minimums >> np.uint64(32)).T
+    return signatures, has_words
+
+
+def question_signatures(questions):
+    """
+    Return the MinHash signatures of a QuestionBank.
+
+    Questions are hashed in batches of SIGNATURE_BATCH: the text of a batch
+    is normalized and split into words at once, and its shingles are
+    hashed as arrays.
+
+    Returns:
+        tuple: (signatures, has_words) where signatures is an array of shape
+            (len(questions), NUM_PERM) and has_words tells which questions
+            have any word; the others have no signature (all bits set) and are
+            never near-duplicates.
+    """
+    n = len(questions)
+    signatures = np.empty((n, NUM_PERM), dtype=np.uint32)
+    has_words = np.empty(n, dtype=bool)
+    word_hashes = _WordHashes()
+    answers = questions.iter_answers()
+    for start in range(0, n, SIGNATURE_BATCH):
+        stop = min(n, start + SIGNATURE_BATCH)
+        text = _batch_text(
+            questions.questions[start:stop], islice(answers, stop - start)
+        )
+        tokens = RE_TOKEN.findall(_normalize(text))
+        index, shingles = _batch_shingles(tokens, word_hashes)
+        batch = _batch_signatures(stop - start, index, shingles)
+        signatures[start:stop], has_words[start:stop] = batch
+    return signatures, has_words
+
+
+def _row_keys(values):
+    """Return one 64-bit key per row of a 2-D array of signature values."""
+    keys = np.zeros(len(values), dtype=np.uint64)
+    for column in values.T.astype(np.uint64):
+        keys = (keys ^ column) * _SHINGLE_MULTIPLIER
+    return keys
+
+
+def _band_keys(signatures, band):
+    """Return one 64-bit key per signature for the values of a band."""
+    rows = NUM_PERM // BANDS
+    return _row_keys(signatures[:, band * rows : (band + 1) * rows])
+
+
+def _min_equal(threshold):
+    """Return the equal signature values of questions with a similarity of threshold."""
+    return int(np.ceil(threshold * NUM_PERM))
+
+
+def _bucket_pairs(keys):
+    """
+    Return (i, j) index arrays of the candidate pairs of the buckets of equal
+    keys: all pairs of a bucket, or in a bucket of more than MAX_BUCKET, the
+    pairs of each index with the next MAX_BUCKET - 1.
+    """
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    # Only indices in buckets of two or more take part in pairs
+    shared = np.zeros(len(keys), dtype=bool)
+    same = sorted_keys[1:] == sorted_keys[:-1]
+    shared[1:] |= same
+    shared[:-1] |= same
+    order, sorted_keys = order[shared], sorted_keys[shared]
+
+    left, right = [], []
+    for distance in range(1, MAX_BUCKET):
+        same = sorted_keys[distance:] == sorted_keys[:-distance]
+        if not same.any():
+            break
+        left.append(order[:-distance][same])
+        right.append(order[distance:][same])
+    if not left:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(left), np.concatenate(right)
+
+
+def _similar(signatures, left, right, threshold):
+    """Return which pairs (left[k], right[k]) have signatures similar enough."""
+    min_equal = _min_equal(threshold)
+    similar = np.empty(len(left), dtype=bool)
+    for start in range(0, len(left), PAIR_BATCH):
+        i = left[start : start + PAIR_BATCH]
+        j = right[start : start + PAIR_BATCH]
+        equal = (signatures[i] == signatures[j]).sum(axis=1)
+        similar[start : start + PAIR_BATCH] = equal >= min_equal
+    return similar
+
+
+def _find_roots(parent):
+    """Compress the paths of a union-find until every node points to its root."""
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            return parent
+        parent = grandparent
+
+
+def _union(parent, left, right):
+    """
+    Merge the pairs (left[k], right[k]) into a union-find of parent indices.
+
+    Each round links the root of the larger index of every pair that is not
+    yet merged under the root of the smaller one, then compresses the paths,
+    with array operations over all the pairs at once.
+
+    Returns:
+        array: The root of each node, the smallest index of its cluster
+    """
+    while True:
+        parent = _find_roots(parent)
+        left_roots, right_roots = parent[left], parent[right]
+        apart = left_roots != right_roots
+        if not apart.any():
+            return parent
+        left, right = left[apart], right[apart]
+        left_roots, right_roots = left_roots[apart], right_roots[apart]
+        # Roots are only linked to smaller ones, so there is no cycle
+        np.minimum.at(
+            parent,
+            np.maximum(left_roots, right_roots),
+            np.minimum(left_roots, right_roots),
+        )
+
+
+def _representatives(signatures, roots, threshold):
+    """
+    Split the components of a union-find into clusters around representatives.
+
+    The representative of a component is its first (smallest) node, and the
+    nodes similar to it join its cluster. The first of the remaining nodes
+    of the component is its next representative, and so on. Each round
+    compares every remaining node with the current representative of its
+    component at once.
+
+    Returns:
+        array: The representative of each node
+    """
+    labels = np.arange(len(roots))
+    representative = labels.copy()
+    remaining = np.flatnonzero(roots != labels)
+    while len(remaining):
+        current = representative[roots[remaining]]
+        similar = _similar(signatures, remaining, current, threshold)
+        labels[remaining[similar]] = current[similar]
+        remaining = remaining[~similar]
+        # remaining is in increasing order: the first node of each component
+        # is the smallest one
+        _, first = np.unique(roots[remaining], return_index=True)
+        representative[roots[remaining[first]]] = remaining[first]
+        remaining = np.delete(remaining, first)
+    return labels
+
+
+def find_duplicates(questions, threshold=DEDUP_THRESHOLD):
+    """
+    Find clusters of near-duplicate questions.
+
+    Args:
+        questions: QuestionBank, DataFrame or iterable of Question records
+        threshold: Estimated Jaccard similarity (0–1) of the word bigrams of
+            two questions (text and answers, case and accent insensitive)
+            from which they are near-duplicates
+
+    Returns:
+        list: Clusters of question indices, each in increasing order and
+            sorted by their first index. Every question of a cluster is a
+            near-duplicate of its first (earliest) question.
+    """
+    bank = _as_question_bank(questions)
+    signatures, has_words = question_signatures(bank)
+    indices = np.flatnonzero(has_words)
+    # One signature per group of questions with the same signature
+    _, first, same = np.unique(
+        _row_keys(signatures[indices]), return_index=True, return_inverse=True
+    )
+    # Number them in the order of their first question
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    signatures, same = signatures[indices[first[order]]], rank[same.ravel()]
+
+    roots = np.arange(len(signatures))
+    for band in range(BANDS):
+        left, right = _bucket_pairs(_band_keys(signatures, band))
+        # Pairs already in the same component need no comparison
+        apart = roots[left] != roots[right]
+        left, right = left[apart], right[apart]
+        similar = _similar(signatures, left, right, threshold)
+        roots = _union(roots, left[similar], right[similar])
+    labels = _representatives(signatures, roots, threshold)[same]
+
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    bounds = np.flatnonzero(np.diff(sorted_labels)) + 1
+    clusters = [
+        indices[group].tolist() for group in np.split(order, bounds) if len(group) > 1
+    ]
+    clusters.sort()
+    return clusters
+
+
+def deduplicate(questions, mode="drop", threshold=DEDUP_THRESHOLD):
+    """
+    Drop or flag the near-duplicate questions of a bank.
+
+    With mode "drop", only the first question of each cluster is kept. With
+    "flag", every question is kept, and the later ones of a cluster get a
+    "Near-duplicate of question N" line in their extra content (which shows
+    in the DOCX table and names the question in the Moodle XML).
+
+    Returns:
+        tuple: (QuestionBank, clusters), clusters as returned by
+            find_duplicates(), with the indices of the input questions
+    """
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"mode must be one of {DEDUP_MODES}, got {mode!r}")
+    bank = _as_question_bank(questions)
+    clusters = find_duplicates(bank, threshold)
+    if not clusters:
+        return bank, clusters
+
+    if mode == "drop":
+        dropped = {i for cluster in clusters for i in cluster[1:]}
+        kept = QuestionBank(q for i, q in enumerate(bank) if i not in dropped)
+        return kept, clusters
+
+    flagged = bank[:]
+    for first, *duplicates in clusters:
+        note = f"Near-duplicate of question {first + 1}"
+        for i in duplicates:
+            extra = flagged.extra[i]
+            flagged.extra[i] = f"{extra}\n{note}" if extra else note
+    return flagged, clusters
+
+
+def cluster_report(questions, clusters):
+    """
+    Return the clusters found in questions (a QuestionBank) as
+    JSON-serializable dicts: the question numbers (1-based) of each cluster
+    and the text of its first question.
+    """
+    return [
+        {
+            "questions": [i + 1 for i in cluster],
+            "question": questions.questions[cluster[0]],
+        }
+        for cluster in clusters
+    ]
+
+
+def format_clusters(questions, clusters, limit=REPORT_CLUSTERS):
+    """
+    Return a text summary of the near-duplicate clusters found in questions
+    (a QuestionBank), listing up to limit of them.
+    """
+    duplicates = sum(len(cluster) - 1 for cluster in clusters)
+    lines = [
+        f"Found {len(clusters)} near-duplicate clusters "
+        f"({duplicates} duplicate questions)"
+    ]
+    for cluster in clusters[:limit]:
+        numbers = ", ".join(str(i + 1) for i in cluster)
+        text = questions.questions[cluster[0]]
+        if len(text) > 60:
+            text = f"{text[:57]}..."
+        lines.append(f"  {numbers}: {text}")
+    if len(clusters) > limit:
+        lines.append(f"  ... and {len(clusters) - limit} more")
+    return "\n".join(lines)
@@ -1,15 +1,67 @@
+import queue
+import threading
+import time
 import tkinter as tk
 from pathlib import Path
 from tkinter import filedialog, messagebox, ttk
 
 from doctomood.main import process_single_file
+from doctomood.parser import parse_processing_config
+from doctomood.progress import BYTES, PARAGRAPHS, QUESTIONS, Cancelled
+
+# Interval at which the Tk event loop picks up the worker's progress events
+POLL_MS = 100
+
+INPUT_PATTERNS = ("*.docx", "*.odt")
+
+# Per-file status table: column id -> (heading, width)
+FILE_TABLE_COLUMNS = {
+    "file": ("File", 220),
+    "status": ("Status", 80),
+    "questions": ("Questions", 80),
+    "duration": ("Time (s)", 70),
+    "error": ("Error", 230),
+}
+
+
+def duplicate_stems(paths):
+    """
+    Return the names of the files of paths whose outputs would overwrite
+    each other: the outputs are named after the file name without its
+    suffix, so a.docx and a.odt would write the same files.
+    """
+    by_stem = {}
+    for path in map(Path, paths):
+        # Case-insensitive, like the file systems of Windows and macOS
+        by_stem.setdefault(path.stem.casefold(), []).append(path.name)
+    return [name for names in by_stem.values() if len(names) > 1 for name in names]
+
+
+def convert_file(input_path, output_dir, extra_content_words=None, answer_labels=None):
+    """
+    Convert one file of a batch, in a worker process.
+
+    Returns:
+        tuple: (number of questions, duration in seconds)
+    """
+    start = time.perf_counter()
+    _, _, questions = process_single_file(
+        input_path,
+        output_dir,
+        respect_name=True,
+        write=True,
+        as_dataframe=False,
+        extra_content_words=extra_content_words,
+        answer_labels=answer_labels,
+    )
+    return len(questions), time.perf_counter() - start
 
 
 class DoctomoodGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Doctomood - Question Processor")
-        self.root.geometry("700x320")
+        self.root.geometry("760x560")
         self.root.resizable(False, False)
 
         # Get default directory (home)
@@ -21,6 +73,18 @@ class DoctomoodGUI:
         # Variables
         self.input_file = tk.StringVar()
         self.output_dir = tk.StringVar()
+        self.input_paths = []
+
+        # Background conversion: the worker thread posts events to the queue,
+        # the Tk event loop polls it (Tk must only be used from this thread)
+        self.worker = None
+        self.events = None
+        self.cancel_event = None
+        self.counts = {}
+        self.started = None
+        self.batch_done = 0
+        self.batch_questions = 0
+        self.batch_error = None
 
         # Create UI
         self.create_widgets()
@@ -56,13 +120,13 @@ class DoctomoodGUI:
         main_container.pack(fill=tk.BOTH, expand=True)
 
         # Input file selection section
-        input_section = ttk.LabelFrame(main_container, text="Input File", padding="15")
+        input_section = ttk.LabelFrame(main_container, text="Input Files", padding="15")
         input_section.pack(fill=tk.X, pady=(0, 15))
 
         input_inner = ttk.Frame(input_section)
         input_inner.pack(fill=tk.X)
 
-        ttk.Label(input_inner, text="File:", font=("Helvetica", 10, "bold")).pack(
+        ttk.Label(input_inner, text="Files:", font=("Helvetica", 10, "bold")).pack(
             side=tk.LEFT, padx=(0, 10)
         )
         input_entry = ttk.Entry(
@@ -88,6 +152,23 @@ class DoctomoodGUI:
         )
         self.input_button.pack(side=tk.LEFT)
 
+        self.folder_button = tk.Button(
+            input_inner,
+            text="🗂 Folder",
+            command=self.select_input_folder,
+            font=("Helvetica", 10, "bold"),
+            bg="#4A90E2",
+            fg="white",
+            activebackground="#357ABD",
+            activeforeground="white",
+            relief=tk.RAISED,
+            bd=2,
+            padx=15,
+            pady=4,
+            cursor="hand2",
+        )
+        self.folder_button.pack(side=tk.LEFT, padx=(10, 0))
+
         # Output directory selection section
         output_section = ttk.LabelFrame(
             main_container, text="Output Directory", padding="15"
@@ -131,9 +212,12 @@ class DoctomoodGUI:
         process_button_container = ttk.Frame(process_section)
         process_button_container.pack(expand=True)
 
+        buttons = ttk.Frame(process_button_container)
+        buttons.pack()
+
         # Use regular Button for better customization and visibility - larger and centered
         self.process_button = tk.Button(
-            process_button_container,
+            buttons,
             text="▶ Process Questions",
             command=self.process_file,
             state=tk.DISABLED,
@@ -148,7 +232,25 @@ class DoctomoodGUI:
             pady=12,
             cursor="hand2",
         )
-        self.process_button.pack(pady=5)
+        self.process_button.pack(side=tk.LEFT, pady=5)
+
+        self.cancel_button = tk.Button(
+            buttons,
+            text="■ Cancel",
+            command=self.cancel_processing,
+            state=tk.DISABLED,
+            font=("Helvetica", 12, "bold"),
+            bg="#CCCCCC",
+            fg="#666666",
+            activebackground="#C82333",
+            activeforeground="white",
+            relief=tk.RAISED,
+            bd=2,
+            padx=20,
+            pady=12,
+            cursor="hand2",
+        )
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0), pady=5)
 
         # Status label with better visibility - centered below button
         self.status_label = ttk.Label(
@@ -156,6 +258,26 @@ class DoctomoodGUI:
         )
         self.status_label.pack(pady=(5, 0))
 
+        # Per-file status table
+        table_section = ttk.LabelFrame(main_container, text="Status", padding="10")
+        table_section.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+
+        self.file_table = ttk.Treeview(
+            table_section,
+            columns=list(FILE_TABLE_COLUMNS),
+            show="headings",
+            height=6,
+        )
+        for column, (heading, width) in FILE_TABLE_COLUMNS.items():
+            self.file_table.heading(column, text=heading)
+            self.file_table.column(column, width=width, stretch=column == "error")
+        scrollbar = ttk.Scrollbar(
+            table_section, orient=tk.VERTICAL, command=self.file_table.yview
+        )
+        self.file_table.configure(yscrollcommand=scrollbar.set)
+        self.file_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
         # Update button state when variables change
         self.input_file.trace_add("write", self.update_button_state)
         self.output_dir.trace_add("write", self.update_button_state)
@@ -163,8 +285,8 @@ class DoctomoodGUI:
     def select_input_file(self):
         # Note: tkinter file dialogs don't support custom sizes, but they remember
         # their last size on most systems. We can only set initialdir.
-        filename = filedialog.askopenfilename(
-            title="Select Input File",
+        filenames = filedialog.askopenfilenames(
+            title="Select Input Files",
             initialdir=self.default_dir,
             filetypes=[
                 ("Document files (*.docx, *.odt)", "*.docx *.odt"),
@@ -173,8 +295,49 @@ class DoctomoodGUI:
                 ("All files", "*.*"),
             ],
         )
-        if filename:
-            self.input_file.set(filename)
+        if filenames:
+            self.set_input_paths(filenames)
+
+    def select_input_folder(self):
+        dirname = filedialog.askdirectory(
+            title="Select Input Folder", initialdir=self.default_dir
+        )
+        if not dirname:
+            return
+        paths = sorted(
+            path for pattern in INPUT_PATTERNS for path in Path(dirname).glob(pattern)
+        )
+        if not paths:
+            messagebox.showwarning(
+                "No Files", f"No .docx or .odt files found in:\n\n{dirname}"
+            )
+            return
+        self.set_input_paths(paths)
+
+    def set_input_paths(self, paths):
+        if self.worker is not None:
+            return
+        duplicates = duplicate_stems(paths)
+        if duplicates:
+            messagebox.showerror(
+                "Error",
+                "These files would write the same output files:\n\n"
+                + "\n".join(duplicates)
+                + "\n\nRename them or convert them separately.",
+            )
+            return
+        self.input_paths = [str(path) for path in paths]
+        if len(self.input_paths) == 1:
+            self.input_file.set(self.input_paths[0])
+        else:
+            folder = Path(self.input_paths[0]).parent
+            self.input_file.set(f"{len(self.input_paths)} files in {folder}")
+
+        self.file_table.delete(*self.file_table.get_children())
+        for i, path in enumerate(self.input_paths):
+            self.file_table.insert(
+                "", tk.END, iid=str(i), values=(Path(path).name, "Pending", "", "", "")
+            )
 
     def select_output_dir(self):
         # Note: tkinter file dialogs don't support custom sizes, but they remember
@@ -186,30 +349,238 @@ class DoctomoodGUI:
             self.output_dir.set(dirname)
 
     def update_button_state(self, *args):
+        if self.worker is not None:
+            return
         if self.input_file.get() and self.output_dir.get():
             self.process_button.config(state=tk.NORMAL, bg="#28A745", fg="white")
         else:
             self.process_button.config(state=tk.DISABLED, bg="#CCCCCC", fg="#666666")
 
     def process_file(self):
-        input_path = self.input_file.get()
         output_path = self.output_dir.get()
 
-        if not input_path or not output_path:
+        if not self.input_paths or not output_path:
             messagebox.showerror(
                 "Error", "Please select both input file and output directory."
             )
             return
-
         try:
-            self.process_button.config(state=tk.DISABLED)
-            self.status_label.config(text="Processing...", foreground="blue")
+            config = parse_processing_config()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.process_button.config(state=tk.DISABLED, bg="#CCCCCC", fg="#666666")
+        self.cancel_button.config(state=tk.NORMAL, bg="#DC3545", fg="white")
+        self.status_label.config(text="Processing...", foreground="blue")
+
+        extra_content_words = config.get("extra_content_words")
+        answer_labels = config.get("answer_labels")
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.counts = {PARAGRAPHS: 0, QUESTIONS: 0, BYTES: 0}
+        self.started = time.perf_counter()
+        self.batch_done = 0
+        self.batch_questions = 0
+        self.batch_error = None
+        for i in range(len(self.input_paths)):
+            self.set_file_status(i, "Pending")
+
+        if len(self.input_paths) == 1:
+            # A single file is converted in a thread, with detailed progress
+            self.set_file_status(0, "Running")
+            target = self.run_conversion
+            args = (
+                self.input_paths[0],
+                output_path,
+                extra_content_words,
+                answer_labels,
+            )
+        else:
+            # Files are converted on a process pool (jobs from config.yml,
+            # default one worker per CPU) and reported one by one
+            target = self.run_batch
+            jobs = config.get("jobs")
+            args = (
+                self.input_paths,
+                output_path,
+                extra_content_words,
+                answer_labels,
+                jobs,
+            )
+        self.worker = threading.Thread(
+            target=target, args=(*args, self.events, self.cancel_event), daemon=True
+        )
+        self.worker.start()
+        self.root.after(POLL_MS, self.poll_events)
+
+    @staticmethod
+    def run_conversion(
+        input_path,
+        output_path,
+        extra_content_words,
+        answer_labels,
+        events,
+        cancel_event,
+    ):
+        """Convert a file in the worker thread, posting progress to events."""
+
+        def progress(stage, n):
+            if cancel_event.is_set():
+                raise Cancelled()
+            events.put(("progress", stage, n))
 
+        try:
             # Process the file with respect_name=True
-            docs_output, xml_output, df = process_single_file(
-                input_path, output_path, respect_name=True, write=True
+            result = process_single_file(
+                input_path,
+                output_path,
+                respect_name=True,
+                write=True,
+                as_dataframe=False,
+                extra_content_words=extra_content_words,
+                answer_labels=answer_labels,
+                progress=progress,
             )
+        except Cancelled:
+            events.put(("cancelled",))
+        except Exception as e:
+            events.put(("error", e))
+        else:
+            events.put(("done", result))
+
+    @staticmethod
+    def run_batch(
+        paths,
+        output_path,
+        extra_content_words,
+        answer_labels,
+        jobs,
+        events,
+        cancel_event,
+    ):
+        """
+        Convert files on a process pool in the worker thread, posting their
+        status. A failure of the pool itself is posted as a "batch_error"
+        event; "batch_done" is always posted last.
+        """
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
+        try:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = {
+                    executor.submit(
+                        convert_file,
+                        path,
+                        output_path,
+                        extra_content_words,
+                        answer_labels,
+                    ): i
+                    for i, path in enumerate(paths)
+                }
+                pending = set(futures)
+                running = set()
+                while pending:
+                    if cancel_event.is_set():
+                        # Files not started yet are skipped, running ones finish
+                        for future in list(pending):
+                            if future.cancel():
+                                pending.discard(future)
+                                events.put(("file", futures[future], "Cancelled"))
+                    for future in pending - running:
+                        if future.running():
+                            running.add(future)
+                            events.put(("file", futures[future], "Running"))
+                    done, pending = wait(
+                        pending, timeout=0.1, return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        try:
+                            count, duration = future.result()
+                        except Exception as e:
+                            events.put(
+                                ("file", futures[future], "Error", "", "", str(e))
+                            )
+                        else:
+                            events.put(
+                                ("file", futures[future], "Done", count, duration)
+                            )
+        except Exception as e:
+            events.put(("batch_error", e))
+        finally:
+            events.put(("batch_done", cancel_event.is_set()))
+
+    def set_file_status(
+        self, i, status, questions="", duration="", error="", see=False
+    ):
+        if isinstance(duration, float):
+            duration = f"{duration:.2f}"
+        name = self.file_table.set(str(i), "file")
+        self.file_table.item(str(i), values=(name, status, questions, duration, error))
+        if see:
+            self.file_table.see(str(i))
+
+    def poll_events(self):
+        """Apply the worker's events; runs on the Tk event loop until it is done."""
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            kind, *payload = event
+            if kind == "progress":
+                stage, n = payload
+                self.counts[stage] += n
+                continue
+            if kind == "file":
+                i, status, *details = payload
+                if status in ("Done", "Error", "Cancelled"):
+                    self.batch_done += 1
+                if status == "Done":
+                    self.batch_questions += details[0]
+                self.set_file_status(i, status, *details, see=True)
+                continue
+            if kind == "batch_error":
+                (self.batch_error,) = payload
+                continue
+            self.finish_processing(kind, *payload)
+            return
+
+        # While cancelling, the label keeps showing "Cancelling..."
+        if not self.cancel_event.is_set():
+            self.status_label.config(text=self.progress_text(), foreground="blue")
+        self.root.after(POLL_MS, self.poll_events)
+
+    def progress_text(self):
+        if len(self.input_paths) > 1:
+            return (
+                f"Processed {self.batch_done} of {len(self.input_paths)} files, "
+                f"{self.batch_questions} questions"
+            )
+        return (
+            f"Read {self.counts[PARAGRAPHS]} paragraphs, "
+            f"parsed {self.counts[QUESTIONS]} questions, "
+            f"wrote {self.counts[BYTES] / 1024:.0f} KB"
+        )
+
+    def cancel_processing(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state=tk.DISABLED, bg="#CCCCCC", fg="#666666")
+            self.status_label.config(text="Cancelling...", foreground="orange")
+
+    def finish_processing(self, kind, result=None):
+        self.worker = None
+        self.cancel_button.config(state=tk.DISABLED, bg="#CCCCCC", fg="#666666")
+        # Restore button state and colors
+        self.update_button_state()
+
+        duration = time.perf_counter() - self.started
+        if kind == "batch_done":
+            self.finish_batch(cancelled=result)
+        elif kind == "done":
+            docs_output, xml_output, df = result
+            self.set_file_status(0, "Done", len(df), duration)
             self.status_label.config(text="Success!", foreground="green")
             messagebox.showinfo(
                 "Success",
@@ -218,20 +589,54 @@ class DoctomoodGUI:
                 f"XML: {xml_output}\n\n"
                 f"Processed {len(df)} questions.",
             )
-        except Exception as e:
+        elif kind == "cancelled":
+            self.set_file_status(0, "Cancelled", "", duration)
+            self.status_label.config(text="Cancelled", foreground="gray")
+        else:
+            self.set_file_status(0, "Error", "", duration, str(result))
             self.status_label.config(text="Error", foreground="red")
-            messagebox.showerror("Error", f"An error occurred:\n\n{str(e)}")
-        finally:
-            # Restore button state and colors
-            if self.input_file.get() and self.output_dir.get():
-                self.process_button.config(state=tk.NORMAL, bg="#28A745", fg="white")
-            else:
-                self.process_button.config(
-                    state=tk.DISABLED, bg="#CCCCCC", fg="#666666"
-                )
+            messagebox.showerror("Error", f"An error occurred:\n\n{str(result)}")
+
+    def finish_batch(self, cancelled):
+        if self.batch_error is not None:
+            # Files the pool did not finish failed with it
+            for i in range(len(self.input_paths)):
+                if self.file_table.set(str(i), "status") in ("Pending", "Running"):
+                    self.set_file_status(i, "Error", "", "", str(self.batch_error))
+        statuses = [
+            self.file_table.set(str(i), "status") for i in range(len(self.input_paths))
+        ]
+        converted = statuses.count("Done")
+        failed = statuses.count("Error")
+        summary = (
+            f"Converted {converted} of {len(statuses)} files, "
+            f"{self.batch_questions} questions."
+        )
+        if cancelled:
+            self.status_label.config(text="Cancelled", foreground="gray")
+        elif failed:
+            self.status_label.config(text=f"{failed} file(s) failed", foreground="red")
+            messagebox.showerror(
+                "Error",
+                f"{summary}\n\n{failed} file(s) could not be processed; "
+                "see the status table for details.",
+            )
+        else:
+            self.status_label.config(text="Success!", foreground="green")
+            messagebox.showinfo(
+                "Success",
+                f"Files processed successfully!\n\n"
+                f"Output folder: {self.output_dir.get()}\n\n{summary}",
+            )
 
 
 def main():
+    # Batch conversions run on a process pool; this lets frozen executables
+    # (see packaging/) start its workers
+    import multiprocessing
+
+    multiprocessing.freeze_support()
+
     root = tk.Tk()
     app = DoctomoodGUI(root)
     root.mainloop()
@@ -1,13 +1,98 @@
-import math
-from xml.sax.saxutils import escape
+import errno
+import io
+import os
+import posixpath
+import re
+import zipfile
+from contextlib import ExitStack, contextmanager
+from itertools import pairwise, repeat
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
 
-import docx
-import pandas as pd
-from docx.enum.text import WD_COLOR_INDEX
+from doctomood.profiling import EXPORT_DOCX, EXPORT_XML, stage
+from doctomood.progress import BYTES, REPORT_EVERY, Cancelled
+from doctomood.questions import (
+    N_ANSWERS,
+    Question,
+    QuestionBank,
+    dataframe_answer_columns,
+    dataframe_answers,
+    row_answers,
+)
+
+ANSWER_COLUMNS = [f"ans{j}" for j in range(N_ANSWERS)]
+
+
+def escape(text):
+    """Escape &, < and > in a string (same as xml.sax.saxutils.escape)."""
+    # xml.sax.saxutils pulls in urllib and http.client, which slows down startup
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Seekable binary file object reading from a bytes-like object in memory.
+
+    Unlike io.BytesIO, a bytearray, memoryview or mmap is not copied: reads
+    are served from a memoryview of it, so an uploaded DOCX file can be
+    opened as a zip archive where it already is.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            # OSError as for a file on disk: zipfile expects it when looking
+            # for the end of an archive in a file smaller than that record
+            raise OSError(errno.EINVAL, f"negative seek position {offset}")
+        self._pos = offset
+        return offset
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else self._pos + size
+        data = self._view[self._pos : end].tobytes()
+        self._pos += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self._view[self._pos : self._pos + len(b)]
+        b[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+def open_input(source):
+    """
+    Return a DOCX source as something zipfile and python-docx can open.
+
+    source is a path, a binary file object, or the content of the file as
+    bytes, bytearray or memoryview (read in place, see BufferReader).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BufferReader(source)
+    return source
 
 
 def get_docx(filename, join=False):
-    doc = docx.Document(filename)
+    import docx
+
+    doc = docx.Document(open_input(filename))
     paragraphs = []
     for para in doc.paragraphs:
         paragraphs.append(para.text)
@@ -17,7 +102,9 @@ def get_docx(filename, join=False):
 
 
 def get_docx_with_highlight_mark(filename):
-    doc = docx.Document(filename)
+    import docx
+
+    doc = docx.Document(open_input(filename))
     paragraphs = []
 
     for para in doc.paragraphs:
@@ -37,126 +124,1007 @@ def get_docx_with_highlight_mark(filename):
     return paragraphs
 
 
-def df_to_docx(df, output_path="questions.docx"):
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+RELS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+OFFICE_DOCUMENT_REL = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+# Text equivalents of the run inner-content elements, as python-docx reads them
+RUN_CONTENT_TEXT = {
+    f"{W_NS}tab": "\t",
+    f"{W_NS}ptab": "\t",
+    f"{W_NS}cr": "\n",
+    f"{W_NS}noBreakHyphen": "-",
+}
+
+
+def _main_document_part(archive):
+    """Return the zip member name of the main document part of a DOCX archive."""
+    try:
+        with archive.open("_rels/.rels") as f:
+            for _, elem in iterparse(f):
+                if (
+                    elem.tag == f"{RELS_NS}Relationship"
+                    and elem.get("Type") == OFFICE_DOCUMENT_REL
+                ):
+                    return posixpath.normpath(elem.get("Target").lstrip("/"))
+    except KeyError:
+        pass
+    return "word/document.xml"
+
+
+def _run_text(run):
+    parts = []
+    for child in run:
+        if child.tag == f"{W_NS}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{W_NS}br":
+            if child.get(f"{W_NS}type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            parts.append(RUN_CONTENT_TEXT.get(child.tag, ""))
+    return "".join(parts)
+
+
+def _is_highlighted(run):
+    rpr = run.find(f"{W_NS}rPr")
+    return rpr is not None and rpr.find(f"{W_NS}highlight") is not None
+
+
+def _paragraph_with_highlight_mark(para):
+    texts = []
+    highlighted = False
+    for child in para:
+        if child.tag == f"{W_NS}r":
+            text = _run_text(child)
+            if not highlighted and text.strip() and _is_highlighted(child):
+                highlighted = True
+            texts.append(text)
+        elif child.tag == f"{W_NS}hyperlink":
+            texts.extend(_run_text(r) for r in child.iterfind(f"{W_NS}r"))
+
+    full_text = "".join(texts).strip()
+    if highlighted:
+        full_text += " [HIGHLIGHTED]"
+    return full_text
+
+
+def iter_docx_with_highlight_mark(filename):
+    """
+    Stream the paragraphs of a DOCX file without building a python-docx Document.
+
+    The main document part is read straight from the zip archive with an
+    incremental XML parser, and each body paragraph is released as soon as it
+    has been yielded. The output is the same as get_docx_with_highlight_mark().
+
+    filename is a path, a binary file object or the file content in memory
+    (see open_input()).
+
+    Yields:
+        str: Stripped paragraph text, suffixed with " [HIGHLIGHTED]" if any
+            non-blank run of the paragraph is highlighted
+    """
+    with zipfile.ZipFile(open_input(filename)) as archive:
+        with archive.open(_main_document_part(archive)) as f:
+            depth = 0
+            body = None
+            for event, elem in iterparse(f, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 2 and elem.tag == f"{W_NS}body":
+                        body = elem
+                    continue
+
+                depth -= 1
+                # Only direct children of <w:body> are document paragraphs
+                if depth == 2 and body is not None:
+                    if elem.tag == f"{W_NS}p":
+                        yield _paragraph_with_highlight_mark(elem)
+                    body.clear()
+
+
+def _correct_indices(correct, n_answers=N_ANSWERS):
+    """
+    Return the 0-based correct answer index of each row, or -1 if there is none.
+
+    Values are converted column-wise: anything that is not a finite number
+    between 0 and n_answers - 1 (NaN, -1, text) means the question has no
+    marked answer.
+    """
+    import pandas as pd
+
+    values = pd.to_numeric(pd.Series(correct, dtype=object), errors="coerce")
+    valid = (values > -1) & (values < n_answers)
+    return values.where(valid, -1).astype(int).tolist()
+
+
+def _str_column(values):
+    import pandas as pd
+
+    return pd.Series(values, dtype=object).map(str).tolist()
+
+
+def _escape_column(values):
+    """Escape &, < and > in a whole column of strings with a single escape() call."""
+    if not values:
+        return []
+    escaped = escape("\0".join(values)).split("\0")
+    if len(escaped) != len(values):
+        # A value contained the separator itself
+        escaped = [escape(value) for value in values]
+    return escaped
+
+
+def _export_columns(questions):
+    """
+    Return the columns exported for a QuestionBank or a DataFrame.
+
+    Returns:
+        tuple: (questions, answer_values, answer_offsets, correct, extra) where
+            the answers of question i are
+            answer_values[answer_offsets[i]:answer_offsets[i + 1]] (as in
+            QuestionBank), correct holds answer indices (-1 if none) and extra
+            holds the raw extra values
+    """
+    if isinstance(questions, QuestionBank):
+        return (
+            questions.questions,
+            questions.answer_values,
+            questions.answer_offsets,
+            questions.correct,
+            questions.extra,
+        )
+    df = questions
+    values, offsets = dataframe_answers(df)
+    n_answers = len(dataframe_answer_columns(df.columns))
+    return (
+        _str_column(df["question"]),
+        values,
+        offsets,
+        _correct_indices(df["correct"], n_answers),
+        df["extra"].tolist(),
+    )
+
+
+def _docx_header(answer_columns):
+    """Return the DOCX table header: question, A, B, … (one per answer), extra."""
+    return ["question", *(chr(ord("A") + j) for j in range(answer_columns)), "extra"]
+
+
+def _table_answer_columns(questions):
+    """
+    Return the answer columns of a DOCX table of questions: N_ANSWERS, or
+    more for a QuestionBank or DataFrame with questions that have more.
+    """
+    if isinstance(questions, QuestionBank):
+        return max(N_ANSWERS, questions.max_answers())
+    if hasattr(questions, "columns"):
+        return max(N_ANSWERS, len(dataframe_answer_columns(questions.columns)))
+    return N_ANSWERS
+
+
+# Characters that are not allowed in XML 1.0 documents
+RE_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+RE_RUN_BREAKS = re.compile(r"([\t\r\n])")
+DOCX_ROWS_PER_WRITE = 1000
+
+
+def _docx_template(header):
+    """Return a DOCX, as bytes, with a "Table Grid" table holding only the header."""
+    import docx
+
     doc = docx.Document()
 
-    table = doc.add_table(rows=1, cols=6)
+    table = doc.add_table(rows=1, cols=len(header))
     table.style = "Table Grid"
-    hdr_cells = table.rows[0].cells
-    hdr_cells[0].text = "question"
-    hdr_cells[1].text = "A"
-    hdr_cells[2].text = "B"
-    hdr_cells[3].text = "C"
-    hdr_cells[4].text = "D"
-    hdr_cells[5].text = "extra"
-
-    for _, row in df.iterrows():
-        # safe read of correct value
-        correct_val = row["correct"]
-
-        # default: no highlight
-        highlight_index = None
-
-        # numeric? finite? 0–3?
-        if isinstance(correct_val, (int, float)) and not math.isnan(correct_val):
-            correct_int = int(correct_val)
-            if 0 <= correct_int <= 3:
-                highlight_index = 1 + correct_int  # A=1, …
-
-        cells = table.add_row().cells
-
-        cells[0].text = str(row["question"])
-        cells[1].text = str(row["ans0"])
-        cells[2].text = str(row["ans1"])
-        cells[3].text = str(row["ans2"])
-        cells[4].text = str(row["ans3"])
-        cells[5].text = str(row["extra"])
-
-        # apply highlight if valid index
-        if highlight_index is not None:
-            cell_to_mark = cells[highlight_index]
-            for paragraph in cell_to_mark.paragraphs:
-                for run in paragraph.runs:
-                    run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-
-    doc.save(output_path)
+    for cell, text in zip(table.rows[0].cells, header):
+        cell.text = text
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _docx_run_content(text):
+    """
+    Return the run content of an escaped cell text, as python-docx writes it.
+
+    Tabs become <w:tab/>, line breaks <w:br/>, and text with leading or
+    trailing whitespace is marked xml:space="preserve".
+    """
+    parts = []
+    for piece in RE_RUN_BREAKS.split(text) if text else ():
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in ("\r", "\n"):
+            parts.append("<w:br/>")
+        elif piece.strip() != piece:
+            parts.append(f'<w:t xml:space="preserve">{piece}</w:t>')
+        elif piece:
+            parts.append(f"<w:t>{piece}</w:t>")
+    return "".join(parts)
+
+
+def _docx_row_xml(texts, highlight, cell_properties):
+    """Return a <w:tr> with one cell per escaped text, highlighting cell highlight."""
+    cells = []
+    for j, text in enumerate(texts):
+        run_properties = (
+            '<w:rPr><w:highlight w:val="yellow"/></w:rPr>' if j == highlight else ""
+        )
+        cells.append(
+            f"<w:tc>{cell_properties}<w:p><w:r>{run_properties}"
+            f"{_docx_run_content(text)}</w:r></w:p></w:tc>"
+        )
+    return f"<w:tr>{''.join(cells)}</w:tr>"
+
+
+class DocxWriter:
+    """
+    Incremental DOCX table writer: questions are added one at a time.
+
+    The document is generated once by python-docx with just the header row;
+    the question rows are then generated as WordprocessingML and streamed
+    into its document part, so memory and time grow linearly with the rows.
+    The correct answer cell is highlighted in yellow. Use as a context
+    manager, or call close() to finish the file.
+
+    The table has answer_columns answer columns. Questions with fewer
+    answers leave the remaining cells empty; the answers of a question with
+    more are written in the last column, one per line.
+
+    A path is written to a temporary file that replaces it on close(): if
+    writing fails or is cancelled, the path keeps its previous content.
+    """
+
+    def __init__(self, output, answer_columns=N_ANSWERS):
+        self.answer_columns = answer_columns
+        self.count = 0
+        self.bytes_written = 0
+        self._chunk = []
+        self._stack = ExitStack()
+        try:
+            self._open(output, _docx_header(answer_columns))
+        except BaseException:
+            self.abort()
+            raise
+
+    def _open(self, output, header):
+        src = zipfile.ZipFile(io.BytesIO(_docx_template(header)))
+        self._src = self._stack.enter_context(src)
+        part = _main_document_part(src)
+        document = src.read(part).decode("utf-8")
+        # Rows are inserted at the end of the (only) table, reusing its cell width
+        head, self._tail = document.rsplit("</w:tbl>", 1)
+        self._cell_properties = re.search(r"<w:tcPr>.*?</w:tcPr>", head).group(0)
+
+        f = self._stack.enter_context(_replacing_output(output, "wb"))
+        dst = zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED)
+        self._dst = self._stack.enter_context(dst)
+
+        members = src.infolist()
+        index = next(i for i, info in enumerate(members) if info.filename == part)
+        for info in members[:index]:
+            self._dst.writestr(info, src.read(info.filename))
+        self._remaining = members[index + 1 :]
+        self._out = self._stack.enter_context(self._dst.open(part, "w"))
+        self._write(head)
+
+    def write_row(self, texts, highlight=None):
+        """Add a row of escaped cell texts, highlighting the cell at index highlight."""
+        self._chunk.append(_docx_row_xml(texts, highlight, self._cell_properties))
+        self.count += 1
+        if len(self._chunk) == DOCX_ROWS_PER_WRITE:
+            self._flush()
+
+    def _fit(self, texts, highlight):
+        """Return the cells of a row, with its answers fitted to the table columns."""
+        n = self.answer_columns
+        if len(texts) == n + 2:
+            return texts, highlight
+        question, *answers, extra = texts
+        if len(answers) > n:
+            answers[n - 1 :] = ["\n".join(answers[n - 1 :])]
+            if highlight is not None:
+                highlight = min(highlight, n)
+        else:
+            answers.extend([""] * (n - len(answers)))
+        return [question, *answers, extra], highlight
+
+    def write(self, question):
+        """Add a Question record or a row mapping."""
+        self.write_row(*self._fit(*_docx_cells(question)))
+
+    def write_all(self, questions):
+        """Add a QuestionBank, a DataFrame or an iterable of questions."""
+        if isinstance(questions, QuestionBank) or hasattr(questions, "columns"):
+            rows = _column_docx_cells(questions)
+        else:
+            rows = map(_docx_cells, questions)
+        for texts, highlight in rows:
+            self.write_row(*self._fit(texts, highlight))
+
+    def _write(self, text):
+        data = text.encode("utf-8")
+        self._out.write(data)
+        self.bytes_written += len(data)
+
+    def _flush(self):
+        self._write("".join(self._chunk))
+        self._chunk = []
+
+    def close(self):
+        if self._out is None:
+            return
+        self._flush()
+        self._write(f"</w:tbl>{self._tail}")
+        self._out.close()
+        self._out = None
+        for info in self._remaining:
+            self._dst.writestr(info, self._src.read(info.filename))
+        self._stack.close()
+
+    def abort(self):
+        """Stop writing and discard the output."""
+        self._out = None
+        _abort(self._stack)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _docx_text(value):
+    return escape(RE_XML_INVALID.sub("", str(value)))
+
+
+def _docx_cells(row):
+    """Return (escaped texts, highlighted cell) for a Question record or row mapping."""
+    if isinstance(row, Question):
+        answers = row.answers
+        texts = [row.question, *answers, row.extra]
+        correct = row.correct
+    else:
+        answers = _row_answers(row)
+        texts = [row["question"], *answers, row["extra"]]
+        correct = _correct_indices([row["correct"]], len(answers))[0]
+    return [_docx_text(text) for text in texts], _highlight(correct, len(answers))
+
+
+def _row_answers(row):
+    """Return the answers of a row mapping with the keys ans0, ans1, …"""
+    return row_answers(row[name] for name in dataframe_answer_columns(row))
+
+
+def _highlight(correct, n_answers):
+    # highlight the correct answer cell (A=1, …)
+    return 1 + correct if 0 <= correct < n_answers else None
+
+
+def _column_docx_cells(questions):
+    """Yield (escaped texts, highlighted cell) for a DataFrame or QuestionBank."""
+    questions, values, offsets, correct, extra = _export_columns(questions)
+    questions, values, extra = [
+        _escape_column([RE_XML_INVALID.sub("", text) for text in column])
+        for column in (questions, values, [str(e) for e in extra])
+    ]
+    fields = zip(questions, pairwise(offsets), correct, extra)
+    for question, (first, last), correct_index, e in fields:
+        texts = [question, *values[first:last], e]
+        yield texts, _highlight(correct_index, last - first)
+
+
+def write_docx(rows, output, answer_columns=None):
+    """
+    Stream questions as a table into a DOCX file at a path or binary file object.
+
+    rows can be a QuestionBank or any iterable of Question records or of
+    mappings with the keys question, ans0, ans1, …, correct and extra. The
+    correct answer cell is highlighted in yellow. The table has
+    answer_columns answer columns: by default N_ANSWERS, or as many as the
+    question with the most answers of a QuestionBank or DataFrame.
+
+    Returns:
+        int: Number of questions written
+    """
+    if answer_columns is None:
+        answer_columns = _table_answer_columns(rows)
+    with DocxWriter(output, answer_columns) as writer:
+        writer.write_all(rows)
+    return writer.count
+
+
+def df_to_docx(df, output_path="questions.docx"):
+    """Write questions (DataFrame or QuestionBank) as a table in a DOCX file."""
+    write_docx(df, output_path)
     print(f"Saved to {output_path}")
 
 
-def df_to_xml(df: pd.DataFrame, output_path="moodle_questions.xml"):
-    def wrap_cdata(text):
-        return f"<![CDATA[{text}]]>"
-
-    xml = ["<quiz>"]
-
-    for i, row in df.iterrows():
-        # define question name id
-        qname = row.get("extra")
-        if not isinstance(qname, str) or qname.strip() == "":
-            qname = f"q_{i+1}"
-
-        # question text html formatted
-        question_html = f"<p><strong>{i+1}.</strong> {escape(str(row['question']))}</p>"
-
-        xml.append('  <question type="multichoice">')
-        xml.append("    <name>")
-        xml.append(f"      <text>{escape(qname)}</text>")
-        xml.append("    </name>")
-
-        xml.append('    <questiontext format="html">')
-        xml.append(f"      <text>{wrap_cdata(question_html)}</text>")
-        xml.append("    </questiontext>")
-
-        xml.append('    <generalfeedback format="html">')
-        xml.append("      <text><![CDATA[]]></text>")
-        xml.append("    </generalfeedback>")
-
-        xml.append("    <defaultgrade>1.0000000</defaultgrade>")
-        xml.append("    <penalty>0.3333333</penalty>")
-        xml.append("    <hidden>0</hidden>")
-        xml.append("    <single>true</single>")
-        xml.append("    <shuffleanswers>true</shuffleanswers>")
-        xml.append("    <answernumbering>abc</answernumbering>")
-
-        answers = [row["ans0"], row["ans1"], row["ans2"], row["ans3"]]
-        correct_index = row["correct"]
-
-        for j, ans in enumerate(answers):
-            if isinstance(correct_index, (int, float)) and int(correct_index) == j:
-                fraction = "100"
-            else:
-                fraction = "0"
-
-            xml.append(f'    <answer fraction="{fraction}" format="html">')
-            xml.append(f"      <text>{wrap_cdata(str(ans))}</text>")
-            xml.append('      <feedback format="html">')
-            xml.append("        <text><![CDATA[]]></text>")
-            xml.append("      </feedback>")
-            xml.append("    </answer>")
-
-        # feedback blocks
-        xml.append('    <correctfeedback format="html">')
-        xml.append("      <text><![CDATA[¡Correcto!]]></text>")
-        xml.append("    </correctfeedback>")
-
-        xml.append('    <partiallycorrectfeedback format="html">')
-        xml.append("      <text><![CDATA[Parcialmente correcto.]]></text>")
-        xml.append("    </partiallycorrectfeedback>")
-
-        xml.append('    <incorrectfeedback format="html">')
-        xml.append(
-            "      <text><![CDATA[Incorrecto. Revisa la explicación y vuelve a intentarlo.]]></text>"
+def _wrap_cdata(text):
+    return f"<![CDATA[{text}]]>"
+
+
+@contextmanager
+def _open_output(output, mode="w"):
+    """Yield a writable file object for a path, or the object itself if file-like."""
+    if hasattr(output, "write"):
+        yield output
+        return
+    encoding = None if "b" in mode else "utf-8"
+    with open(output, mode, encoding=encoding) as f:
+        yield f
+
+
+@contextmanager
+def _replacing_output(output, mode="w"):
+    """
+    Like _open_output(), but a path is written to a temporary file next to
+    it, which replaces it only if the block exits without an exception: an
+    interrupted export leaves neither a partial file nor a clobbered one.
+    """
+    if hasattr(output, "write"):
+        yield output
+        return
+    output = Path(output)
+    tmp_path = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+    try:
+        with _open_output(tmp_path, mode) as f:
+            yield f
+        os.replace(tmp_path, output)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _abort(stack):
+    """Close the contexts of a writer as if its export had been cancelled."""
+    stack.__exit__(Cancelled, Cancelled(), None)
+
+
+def _question_xml(i, qname, question, answers, correct):
+    """
+    Return the Moodle XML of one question, numbered i + 1.
+
+    qname and question must already be XML-escaped; correct is the index of
+    the correct answer, or -1 if there is none.
+    """
+    question_html = f"<p><strong>{i+1}.</strong> {question}</p>"
+
+    xml = []
+    xml.append('  <question type="multichoice">')
+    xml.append("    <name>")
+    xml.append(f"      <text>{qname}</text>")
+    xml.append("    </name>")
+
+    xml.append('    <questiontext format="html">')
+    xml.append(f"      <text>{_wrap_cdata(question_html)}</text>")
+    xml.append("    </questiontext>")
+
+    xml.append('    <generalfeedback format="html">')
+    xml.append("      <text><![CDATA[]]></text>")
+    xml.append("    </generalfeedback>")
+
+    xml.append("    <defaultgrade>1.0000000</defaultgrade>")
+    xml.append("    <penalty>0.3333333</penalty>")
+    xml.append("    <hidden>0</hidden>")
+    xml.append("    <single>true</single>")
+    xml.append("    <shuffleanswers>true</shuffleanswers>")
+    xml.append("    <answernumbering>abc</answernumbering>")
+
+    for j, ans in enumerate(answers):
+        fraction = "100" if j == correct else "0"
+
+        xml.append(f'    <answer fraction="{fraction}" format="html">')
+        xml.append(f"      <text>{_wrap_cdata(ans)}</text>")
+        xml.append('      <feedback format="html">')
+        xml.append("        <text><![CDATA[]]></text>")
+        xml.append("      </feedback>")
+        xml.append("    </answer>")
+
+    # feedback blocks
+    xml.append('    <correctfeedback format="html">')
+    xml.append("      <text><![CDATA[¡Correcto!]]></text>")
+    xml.append("    </correctfeedback>")
+
+    xml.append('    <partiallycorrectfeedback format="html">')
+    xml.append("      <text><![CDATA[Parcialmente correcto.]]></text>")
+    xml.append("    </partiallycorrectfeedback>")
+
+    xml.append('    <incorrectfeedback format="html">')
+    xml.append(
+        "      <text><![CDATA[Incorrecto. Revisa la explicación y vuelve a intentarlo.]]></text>"
+    )
+    xml.append("    </incorrectfeedback>")
+
+    xml.append("  </question>")
+    return "\n".join(xml)
+
+
+def _question_name(i, extra):
+    # Question name id: the extra content if any, otherwise q_<number>
+    if isinstance(extra, str) and extra.strip() != "":
+        return extra
+    return f"q_{i+1}"
+
+
+def _question_args(i, row):
+    """Return _question_xml() arguments for a Question record or row mapping."""
+    if isinstance(row, Question):
+        return (
+            i,
+            escape(_question_name(i, row.extra)),
+            escape(row.question),
+            row.answers,
+            row.correct,
         )
-        xml.append("    </incorrectfeedback>")
+    answers = _row_answers(row)
+    return (
+        i,
+        escape(_question_name(i, row.get("extra"))),
+        escape(str(row["question"])),
+        answers,
+        _correct_indices([row["correct"]], len(answers))[0],
+    )
+
+
+def _column_questions(questions, start=0):
+    """Yield _question_xml() arguments for a DataFrame or QuestionBank, column-wise."""
+    questions, values, offsets, correct, extra = _export_columns(questions)
+    names = _escape_column(
+        [_question_name(i, e) for i, e in enumerate(extra, start=start)]
+    )
+    questions = _escape_column(questions)
+    answers = (values[first:last] for first, last in pairwise(offsets))
+    fields = zip(names, questions, answers, correct)
+    for i, question_fields in enumerate(fields, start=start):
+        yield (i, *question_fields)
+
+
+def _render_question(args):
+    """Return the UTF-8 XML of a question from its _question_xml() arguments."""
+    return f"\n{_question_xml(*args)}".encode("utf-8")
+
+
+def render_xml(questions, start=0):
+    """
+    Return the UTF-8 Moodle XML of a QuestionBank or DataFrame, numbered from
+    start + 1, without the <quiz> header and footer of XmlWriter.
+
+    Consecutive slices rendered with the matching start, between
+    XmlWriter.HEADER and XmlWriter.FOOTER, give the same document as
+    write_xml().
+    """
+    return b"".join(map(_render_question, _column_questions(questions, start)))
+
+
+class XmlWriter:
+    """
+    Incremental Moodle XML writer: questions are written one at a time.
+
+    Output is a path or a writable text or binary file object. Questions are
+    numbered from start + 1. Use as a context manager, or call close() to
+    finish the document. As with DocxWriter, a path is only replaced once
+    the document is complete.
+    """
+
+    HEADER = "<quiz>"
+    FOOTER = "\n</quiz>"
+
+    def __init__(self, output, start=0):
+        self.start = start
+        self.count = 0
+        self.bytes_written = 0
+        self._stack = ExitStack()
+        self._f = self._stack.enter_context(_replacing_output(output, "wb"))
+        self._text = isinstance(self._f, io.TextIOBase)
+        self.write_rendered(self.HEADER.encode("utf-8"), count=0)
+
+    def render(self, question):
+        """Return the UTF-8 XML of a Question record or row mapping, as next question."""
+        return _render_question(_question_args(self.start + self.count, question))
+
+    def write_rendered(self, data, count=1):
+        """Write render() output (or the header/footer, with count=0)."""
+        self._f.write(data.decode("utf-8") if self._text else data)
+        self.bytes_written += len(data)
+        self.count += count
+
+    def write(self, question):
+        self.write_rendered(self.render(question))
+
+    def write_all(self, questions):
+        """Write a QuestionBank, a DataFrame or an iterable of questions."""
+        if isinstance(questions, QuestionBank) or hasattr(questions, "columns"):
+            args = _column_questions(questions, start=self.start + self.count)
+            for question_args in args:
+                self.write_rendered(_render_question(question_args))
+        else:
+            for question in questions:
+                self.write(question)
+
+    def close(self):
+        if self._f is None:
+            return
+        self.write_rendered(self.FOOTER.encode("utf-8"), count=0)
+        self._f = None
+        self._stack.close()
+
+    def abort(self):
+        """Stop writing and discard the output."""
+        self._f = None
+        _abort(self._stack)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_xml(rows, output):
+    """
+    Stream Moodle XML for question rows to a path or writable file object.
+
+    Each <question> is written as soon as its row is read, so rows can be a
+    QuestionBank or any iterable (e.g. a generator) of Question records or of
+    mappings with the keys question, ans0, ans1, …, correct and extra, and the
+    whole document is never held in memory.
+
+    Returns:
+        int: Number of questions written
+    """
+    with XmlWriter(output) as writer:
+        writer.write_all(rows)
+    return writer.count
+
 
-        xml.append("  </question>")
+def df_to_xml(df, output_path="moodle_questions.xml", return_text=False):
+    """
+    Write questions as Moodle XML.
 
-    xml.append("</quiz>")
+    Args:
+        df: DataFrame or QuestionBank of parsed questions
+        output_path: Path or writable file object
+        return_text: If True, also build and return the XML as a string. This
+            keeps a full copy of the document in memory.
 
-    # write XML file
-    xml_text = "\n".join(xml)
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(xml_text)
+    Returns:
+        str | None: The XML text if return_text is True, otherwise None
+    """
+    if return_text:
+        buffer = io.BytesIO()
+        write_xml(df, buffer)
+        data = buffer.getvalue()
+        xml_text = data.decode("utf-8")
+        # Text or binary file objects, like XmlWriter
+        with _replacing_output(output_path, "wb") as f:
+            f.write(xml_text if isinstance(f, io.TextIOBase) else data)
+    else:
+        xml_text = None
+        write_xml(df, output_path)
 
     print(f"Saved Moodle XML to {output_path}")
     return xml_text
+
+
+OUTPUT_FORMATS = ("docx", "xml")
+
+# DOCX writer of the export worker process, see _DocxProcessWriter
+_worker_docx = None
+
+
+def _worker_open_docx(output, answer_columns):
+    global _worker_docx
+    _worker_docx = DocxWriter(output, answer_columns)
+
+
+def _worker_write_docx(questions):
+    _worker_docx.write_all(questions)
+
+
+def _worker_close_docx():
+    global _worker_docx
+    _worker_docx, writer = None, _worker_docx
+    writer.close()
+
+
+def _worker_abort_docx():
+    global _worker_docx
+    _worker_docx, writer = None, _worker_docx
+    if writer is not None:
+        writer.abort()
+
+
+class _DocxProcessWriter:
+    """
+    DocxWriter that runs in a worker process.
+
+    Batches of questions are pickled to a single worker, which writes them in
+    submission order while this process goes on with the Moodle XML. Only a
+    few batches are queued at a time, so a slow writer holds back the caller
+    instead of piling up questions in memory.
+    """
+
+    MAX_PENDING = 4
+
+    def __init__(self):
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+
+        self._executor = ProcessPoolExecutor(max_workers=1)
+        self._pending = deque()
+
+    def _submit(self, fn, *args, saved=None):
+        self._pending.append((self._executor.submit(fn, *args), saved))
+        while len(self._pending) > self.MAX_PENDING:
+            self._wait()
+
+    def _wait(self):
+        """Wait for the oldest call, reporting the file it finished, if any."""
+        future, saved = self._pending.popleft()
+        future.result()
+        if saved is not None:
+            # Printed here rather than by the worker, whose standard output
+            # may not follow redirections of this process
+            print(f"Saved DOCX file to {saved}")
+
+    def open(self, output, answer_columns):
+        self._submit(_worker_open_docx, output, answer_columns)
+
+    def write_all(self, questions):
+        self._submit(_worker_write_docx, questions)
+
+    def close(self, output):
+        self._submit(_worker_close_docx, saved=output)
+
+    def shutdown(self):
+        """Wait for all batches to be written, raising the first error if any."""
+        try:
+            while self._pending:
+                self._wait()
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+    def abort(self):
+        """Drop the queued batches and discard the file being written."""
+        while self._pending:
+            self._pending.popleft()[0].cancel()
+        try:
+            self._executor.submit(_worker_abort_docx).result()
+        except Exception:
+            # Already failing: the error that aborted the export is reported
+            pass
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+
+def _as_question_bank(questions):
+    if isinstance(questions, QuestionBank):
+        return questions
+    if hasattr(questions, "columns"):
+        return QuestionBank.from_dataframe(questions)
+    return QuestionBank(questions)
+
+
+class ShardedWriter:
+    """
+    Write questions to DOCX and/or Moodle XML files of bounded size.
+
+    Without limits, all questions go to questions_<name>.docx/.xml. With
+    max_questions and/or max_bytes, they are split into shards named
+    questions_<name>_001.docx/.xml, questions_<name>_002.docx/.xml, … A
+    shard is finished and written as soon as it is full, so questions can be
+    added batch by batch while the next input files are still being parsed.
+
+    max_bytes bounds the size of each Moodle XML file (the file that is
+    uploaded to Moodle); a question larger than that on its own still gets
+    a shard. Questions are numbered across shards.
+
+    Each batch of questions is read once and fed to every output format.
+    With parallel=True, the DOCX files are written by a worker process while
+    this process writes the Moodle XML, so exporting both takes about as
+    long as the slower of the two.
+
+    progress is an optional callback reporting the bytes written (see
+    doctomood.progress); DOCX bytes are the uncompressed document XML, and
+    are not reported with parallel=True.
+
+    answer_columns is the number of answer columns of the DOCX tables (see
+    DocxWriter). By default, each table gets N_ANSWERS, or as many as the
+    question with the most answers in the batch that opens its shard.
+
+    Each shard replaces its paths only once it is complete. If an exception
+    (such as Cancelled) leaves the with block, the shard being written is
+    discarded and its paths keep their previous content.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        name,
+        max_questions=None,
+        max_bytes=None,
+        formats=OUTPUT_FORMATS,
+        parallel=False,
+        progress=None,
+        answer_columns=None,
+    ):
+        unknown = set(formats) - set(OUTPUT_FORMATS)
+        if unknown or not formats:
+            raise ValueError(
+                f"formats must be a non-empty subset of {OUTPUT_FORMATS}, got {formats}"
+            )
+        self.output_dir = Path(output_dir)
+        self.name = name
+        self.max_questions = max_questions
+        self.max_bytes = max_bytes
+        self.formats = tuple(f for f in OUTPUT_FORMATS if f in formats)
+        self.progress = progress
+        self.answer_columns = answer_columns
+        self.count = 0
+        self.paths = []
+        self._open = False
+        self._shard_count = 0
+        self._shard_bytes = 0
+        self._reported_bytes = 0
+        self._xml = None
+        self._docx = None
+        self._docx_process = None
+        self._profile = None
+        self._batch_answer_columns = N_ANSWERS
+        if parallel and "docx" in self.formats:
+            self._docx_process = _DocxProcessWriter()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def shard_paths(self, index):
+        """Return the (DOCX path, XML path) of shard number index (from 0)."""
+        stem = f"questions_{self.name}"
+        if self.max_questions is not None or self.max_bytes is not None:
+            stem = f"{stem}_{index + 1:03d}"
+        return self.output_dir / f"{stem}.docx", self.output_dir / f"{stem}.xml"
+
+    def _is_full(self, data):
+        if self._shard_count == 0:
+            return False
+        if self.max_questions is not None and self._shard_count >= self.max_questions:
+            return True
+        if self.max_bytes is None:
+            return False
+        size = self._shard_bytes + len(data) + len(XmlWriter.FOOTER)
+        return size > self.max_bytes
+
+    def _open_shard(self):
+        docs_output, xml_output = self.shard_paths(len(self.paths))
+        answer_columns = self.answer_columns or self._batch_answer_columns
+        with stage(self._profile, EXPORT_DOCX):
+            if self._docx_process is not None:
+                self._docx_process.open(docs_output, answer_columns)
+            elif "docx" in self.formats:
+                self._docx = DocxWriter(docs_output, answer_columns)
+        if "xml" in self.formats:
+            self._xml = XmlWriter(xml_output, start=self.count)
+        self.paths.append((docs_output, xml_output))
+        self._open = True
+        self._shard_count = 0
+        self._shard_bytes = len(XmlWriter.HEADER)
+        self._reported_bytes = 0
+
+    def _report_bytes(self):
+        """Report the bytes written to the current shard since the last call."""
+        writers = [w for w in (self._docx, self._xml) if w is not None]
+        written = sum(writer.bytes_written for writer in writers)
+        if self.progress is not None and written > self._reported_bytes:
+            self.progress(BYTES, written - self._reported_bytes)
+        self._reported_bytes = written
+
+    def _close_shard(self):
+        docs_output, xml_output = self.paths[-1]
+        if self._docx_process is not None:
+            # Reported once the worker has actually written it
+            self._docx_process.close(docs_output)
+        elif self._docx is not None:
+            with stage(self._profile, EXPORT_DOCX):
+                self._docx.close()
+            print(f"Saved DOCX file to {docs_output}")
+        if "xml" in self.formats:
+            self._xml.close()
+            print(f"Saved Moodle XML file to {xml_output}")
+        self._report_bytes()
+        self._docx = self._xml = None
+        self._open = False
+
+    def _write_docx(self, bank, start, stop):
+        if start == stop:
+            return
+        if stop - start < len(bank):
+            bank = bank[start:stop]
+        with stage(self._profile, EXPORT_DOCX):
+            if self._docx_process is not None:
+                self._docx_process.write_all(bank)
+            elif self._docx is not None:
+                self._docx.write_all(bank)
+
+    def write_all(self, questions, profile=None):
+        """
+        Add a QuestionBank, a DataFrame or an iterable of Question records.
+
+        With a FileProfile, the export time is recorded in it per format
+        (with parallel=True, only the time to hand the DOCX rows over).
+        """
+        bank = _as_question_bank(questions)
+        self._profile = profile
+        try:
+            with stage(profile, EXPORT_XML if "xml" in self.formats else EXPORT_DOCX):
+                self._write_bank(bank)
+        finally:
+            self._profile = None
+
+    def _write_bank(self, bank):
+        if self.answer_columns is None and "docx" in self.formats:
+            self._batch_answer_columns = _table_answer_columns(bank)
+        if "xml" in self.formats or self.max_bytes is not None:
+            # The XML is also rendered to measure the shard size
+            rendered = map(_render_question, _column_questions(bank, start=self.count))
+        else:
+            rendered = repeat(b"", len(bank))
+
+        start = 0
+        for i, data in enumerate(rendered):
+            if not self._open:
+                self._open_shard()
+            elif self._is_full(data):
+                self._write_docx(bank, start, i)
+                start = i
+                self._close_shard()
+                self._open_shard()
+            if self._xml is not None:
+                self._xml.write_rendered(data)
+            self._shard_count += 1
+            self._shard_bytes += len(data)
+            self.count += 1
+            if self.count % REPORT_EVERY == 0:
+                self._report_bytes()
+        self._write_docx(bank, start, len(bank))
+        self._report_bytes()
+
+    def close(self):
+        """
+        Finish the last shard.
+
+        Returns:
+            list: (DOCX path, XML path) of every shard written
+        """
+        if not self.paths:
+            # No questions at all: still write (empty) outputs
+            self._open_shard()
+        try:
+            if self._open:
+                self._close_shard()
+        finally:
+            if self._docx_process is not None:
+                self._docx_process.shutdown()
+                self._docx_process = None
+        return self.paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+            return
+        for writer in (self._docx, self._xml):
+            if writer is not None:
+                writer.abort()
+        self._docx = self._xml = None
+        self._open = False
+        if self._docx_process is not None:
+            self._docx_process.abort()
+            self._docx_process = None
@@ -1,62 +1,307 @@
+import os
+import sys
+from contextlib import nullcontext, redirect_stdout
 from datetime import datetime
 from glob import glob
 from pathlib import Path
 
-from doctomood.ioutils import df_to_docx, df_to_xml
 from doctomood.parser import get_parser
-from doctomood.process import process_multiple
 
+# The conversion pipeline (python-docx, pandas, ...) is imported inside the
+# functions below, so that argument parsing and `--help` start fast.
 
-def process_glob(glob_patterns):
+
+def _glob_paths(glob_patterns):
     paths = []
     for glob_pattern in glob_patterns:
         paths.extend(glob(glob_pattern))
-    return process_multiple(paths)
+    return paths
+
+
+def process_glob(
+    glob_patterns,
+    jobs=1,
+    return_errors=False,
+    cache=None,
+    as_dataframe=True,
+    extra_content_words=None,
+    answer_labels=None,
+):
+    from doctomood.process import process_multiple
+
+    return process_multiple(
+        _glob_paths(glob_patterns),
+        jobs=jobs,
+        return_errors=return_errors,
+        cache=cache,
+        as_dataframe=as_dataframe,
+        extra_content_words=extra_content_words,
+        answer_labels=answer_labels,
+    )
 
 
-def process_single_file(input_file, output_dir, respect_name=True, write=True):
+def process_single_file(
+    input_file,
+    output_dir,
+    respect_name=True,
+    write=True,
+    as_dataframe=True,
+    extra_content_words=None,
+    formats=("docx", "xml"),
+    parallel_export=False,
+    progress=None,
+    jobs=1,
+    answer_labels=None,
+):
     """
     Process a single input file and generate output files.
 
     Args:
-        input_file: Path to input file (str or Path)
-        output_dir: Output directory (Path)
+        input_file: Path to input file (str or Path), binary file object, or
+            the file content as bytes, bytearray or memoryview
+        output_dir: Output directory (Path), or None to return the outputs
+            as bytes instead of writing files
         respect_name: If True, use input file stem for output names
         write: If True, write output files
+        as_dataframe: If False, return the questions as a QuestionBank
+        extra_content_words: Words that start explanation/note lines
+        formats: Output formats to write, "docx" and/or "xml"
+        parallel_export: If True, write the DOCX file in a worker process
+            while writing the XML file
+        progress: Optional callback reporting paragraphs read, questions
+            parsed and bytes written (see doctomood.progress). It may raise
+            doctomood.progress.Cancelled to stop the conversion.
+        jobs: Worker processes classifying the blocks of a large document;
+            1 parses serially in this process, None uses one per CPU
+        answer_labels: Labels of answer lines, e.g. "a-f", "1-4" or "i-iv"
+            (default: "a-d")
 
     Returns:
-        tuple: (docs_output_path, xml_output_path, dataframe)
+        tuple: (docs_output, xml_output, questions) where the outputs are the
+            paths of the files, or their content as bytes if output_dir is
+            None; the output of a format that is not written is None
     """
-    input_path = Path(input_file)
-    if not input_path.exists():
-        raise FileNotFoundError(f"Input file not found: {input_path}")
+    from doctomood.process import process_docx
 
-    output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    if respect_name:
+    name_stem = None
+    if isinstance(input_file, (str, os.PathLike)):
+        input_path = Path(input_file)
+        if not input_path.exists():
+            raise FileNotFoundError(f"Input file not found: {input_path}")
         name_stem = input_path.stem
-    else:
+    elif isinstance(getattr(input_file, "name", None), str):
+        # File objects opened from a path
+        name_stem = Path(input_file.name).stem
+    if not respect_name or name_stem is None:
         name_stem = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+    df = process_docx(
+        input_file,
+        as_dataframe=as_dataframe,
+        extra_content_words=extra_content_words,
+        progress=progress,
+        jobs=jobs,
+        answer_labels=answer_labels,
+    )
+
+    if output_dir is None:
+        docs_output, xml_output = _export_bytes(df, formats, progress, write)
+        return docs_output, xml_output, df
+
+    output_dir = Path(output_dir)
     docs_output = output_dir / f"questions_{name_stem}.docx"
     xml_output = output_dir / f"questions_{name_stem}.xml"
-
-    df = process_multiple([input_path])
+    if "docx" not in formats:
+        docs_output = None
+    if "xml" not in formats:
+        xml_output = None
 
     if write:
-        df_to_docx(df, docs_output)
-        print(f"Saved DOCX file to {docs_output}")
+        from doctomood.ioutils import ShardedWriter
 
-        df_to_xml(df, xml_output)
-        print(f"Saved Moodle XML file to {xml_output}")
+        writer = ShardedWriter(
+            output_dir,
+            name_stem,
+            formats=formats,
+            parallel=parallel_export,
+            progress=progress,
+        )
+        with writer:
+            writer.write_all(df)
 
     return docs_output, xml_output, df
 
 
+def _export_bytes(questions, formats, progress, write=True):
+    """Return the (DOCX, Moodle XML) content of questions, None if not written."""
+    from io import BytesIO
+
+    from doctomood.ioutils import write_docx, write_xml
+    from doctomood.progress import BYTES
+
+    outputs = []
+    for fmt, write_format in (("docx", write_docx), ("xml", write_xml)):
+        if not write or fmt not in formats:
+            outputs.append(None)
+            continue
+        buffer = BytesIO()
+        write_format(questions, buffer)
+        data = buffer.getvalue()
+        if progress is not None:
+            progress(BYTES, len(data))
+        outputs.append(data)
+    return tuple(outputs)
+
+
+def _write_json(data, output, stdout):
+    """Write data as JSON to the path output, or to stdout if output is "-"."""
+    import json
+
+    if output == "-":
+        json.dump(data, stdout, indent=2, ensure_ascii=False)
+        stdout.write("\n")
+        stdout.flush()
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _report_profiles(profiles, show_table, json_output, stdout):
+    from doctomood.profiling import format_profile_table, profile_report
+
+    if show_table:
+        print(format_profile_table(profiles))
+    if json_output:
+        _write_json(profile_report(profiles), json_output, stdout)
+
+
+def _deduplicate(bank, args, stdout):
+    """Drop or flag the near-duplicates of bank (--dedup) and report the clusters."""
+    from doctomood.dedup import (
+        DEDUP_THRESHOLD,
+        cluster_report,
+        deduplicate,
+        format_clusters,
+    )
+
+    threshold = args.dedup_threshold
+    if threshold is None:
+        threshold = DEDUP_THRESHOLD
+    deduplicated, clusters = deduplicate(bank, args.dedup, threshold)
+    print(format_clusters(bank, clusters))
+    if args.dedup_report:
+        _write_json(cluster_report(bank, clusters), args.dedup_report, stdout)
+    return deduplicated
+
+
+def _convert(args, name_stem, stdout):
+    """
+    Convert the input files of the command line arguments.
+
+    Returns:
+        list: (path, exception) of the files that could not be parsed
+    """
+    from doctomood.cache import QuestionCache
+    from doctomood.ioutils import ShardedWriter
+    from doctomood.process import iter_process_files, iter_stream_files, max_answers
+    from doctomood.questions import QuestionBank
+
+    cache = None
+    if args.cache and not args.stream:
+        cache = QuestionCache(
+            args.cache_dir, max_bytes=int(args.cache_max_mb * 1024 * 1024)
+        )
+
+    progress = None
+    if args.progress:
+        from doctomood.progress import TqdmProgress
+
+        progress = TqdmProgress()
+
+    writer = None
+    if args.write:
+        writer = ShardedWriter(
+            args.output_dir,
+            name_stem,
+            max_questions=args.max_questions_per_file,
+            max_bytes=args.max_bytes,
+            formats=args.formats,
+            parallel=args.parallel_export,
+            progress=progress,
+            # Known up front, as the files are written as they are parsed
+            answer_columns=max_answers(args.answer_labels),
+        )
+
+    profiles = None
+    if args.profile or args.profile_json:
+        profiles = []
+
+    # Questions are written file by file (or batch by batch with --stream)
+    # while the next ones are parsed; full shards are finished right away, so
+    # memory stays bounded.
+    errors = []
+    banks = []
+    if args.stream:
+        results = iter_stream_files(
+            _glob_paths(args.input),
+            jobs=args.jobs,
+            extra_content_words=args.extra_content_words,
+            progress=progress,
+            profiles=profiles,
+            answer_labels=args.answer_labels,
+        )
+    else:
+        results = iter_process_files(
+            _glob_paths(args.input),
+            jobs=args.jobs,
+            cache=cache,
+            extra_content_words=args.extra_content_words,
+            progress=progress,
+            profiles=profiles,
+            answer_labels=args.answer_labels,
+        )
+    try:
+        for path, bank, error in results:
+            # The profile of this file, appended before it was yielded
+            profile = profiles[-1] if profiles is not None else None
+            if error is not None:
+                print(f"Failed to process {path}: {error}", file=sys.stderr)
+                errors.append((path, error))
+            elif args.dedup is not None:
+                # Near-duplicates are found across all files before writing
+                banks.append(bank)
+            elif writer is not None:
+                writer.write_all(bank, profile=profile)
+                if profile is not None:
+                    profile.update_peak_rss()
+
+        if args.dedup is not None:
+            bank = _deduplicate(QuestionBank.concat(banks), args, stdout)
+            if writer is not None:
+                writer.write_all(bank)
+
+        if writer is not None:
+            writer.close()
+    finally:
+        if progress is not None:
+            progress.close()
+
+    if profiles is not None:
+        _report_profiles(profiles, args.profile, args.profile_json, stdout)
+    return errors
+
+
 def main():
+    if sys.argv[1:2] == ["watch"]:
+        from doctomood.watch import main as watch_main
+
+        return watch_main(sys.argv[2:])
+    if sys.argv[1:2] == ["serve"]:
+        from doctomood.serve import main as serve_main
+
+        return serve_main(sys.argv[2:])
+
     args = get_parser().parse_args()
-    output_dir = args.output_dir
 
     if args.respect_name:
         if len(args.input) > 1:
@@ -77,17 +322,16 @@ def main():
     else:
         name_stem = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    docs_output = output_dir / f"questions_{name_stem}.docx"
-    xml_output = output_dir / f"questions_{name_stem}.xml"
-
-    df = process_glob(args.input)
-
-    if args.write:
-        df_to_docx(df, docs_output)
-        print(f"Saved DOCX file to {docs_output}")
-
-        df_to_xml(df, xml_output)
-        print(f"Saved Moodle XML file to {xml_output}")
+    stdout = sys.stdout
+    messages = nullcontext()
+    if "-" in (args.profile_json, args.dedup_report):
+        # Standard output carries the JSON, so that it can be parsed: the
+        # messages go to standard error instead
+        messages = redirect_stdout(sys.stderr)
+    with messages:
+        errors = _convert(args, name_stem, stdout)
+    if errors:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
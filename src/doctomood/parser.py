@@ -1,8 +1,6 @@
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 from pathlib import Path
 
-import yaml
-
 
 def find_config_file():
     """Find config.yml file, checking current directory first, then project root."""
@@ -26,6 +24,9 @@ def parse_config():
     if config_file is None:
         return {}
     try:
+        # Imported here so that runs without a config file never load yaml
+        import yaml
+
         with open(config_file, "r") as f:
             config = yaml.safe_load(f)
         return config if config else {}
@@ -33,6 +34,168 @@ def parse_config():
         return {}
 
 
+def _convert_config(parser, config):
+    """
+    Return the values of config (from config.yml) converted and validated
+    like the command line values of the same options of parser.
+
+    Raises:
+        ValueError: If a value is invalid
+    """
+    converted = dict(config)
+    actions = {action.dest: action for action in parser._actions}
+    for key, value in config.items():
+        action = actions.get(key)
+        # An empty value leaves the option unset
+        if action is None or action.type is None or value in (None, ""):
+            continue
+        try:
+            if isinstance(value, list):
+                converted[key] = [action.type(str(item)) for item in value]
+            else:
+                converted[key] = action.type(str(value))
+        except (ArgumentTypeError, TypeError, ValueError) as e:
+            raise ValueError(f"invalid {key} in config.yml: {e}") from None
+    return converted
+
+
+def _set_config_defaults(parser):
+    """
+    Use the values of config.yml as the defaults of parser, converted and
+    validated like the command line values of the same options.
+    """
+    try:
+        defaults = _convert_config(parser, parse_config())
+    except ValueError as e:
+        parser.error(str(e))
+    parser.set_defaults(**defaults)
+
+
+def parse_processing_config():
+    """
+    Return the values of config.yml, with the processing options (jobs,
+    extra_content_words, answer_labels, …) converted and validated like on
+    the command line, for the GUI.
+
+    Raises:
+        ValueError: If a value is invalid
+    """
+    parser = ArgumentParser(add_help=False)
+    _add_processing_arguments(parser)
+    return _convert_config(parser, parse_config())
+
+
+def _jobs(value):
+    jobs = int(value)
+    if jobs < 0:
+        raise ArgumentTypeError(f"--jobs must be >= 0, got {jobs}")
+    return jobs or None
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"must be >= 1, got {number}")
+    return number
+
+
+def _similarity(value):
+    try:
+        similarity = float(value)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid similarity: {value!r}") from None
+    if not 0 < similarity <= 1:
+        raise ArgumentTypeError(f"must be between 0 and 1, got {value!r}")
+    return similarity
+
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def _byte_size(value):
+    """Parse a size such as 500000, 512K or 10M (optionally followed by B)."""
+    text = value.strip().upper().removesuffix("B")
+    unit = text[-1:] if text[-1:] in SIZE_UNITS else ""
+    try:
+        size = int(float(text[: len(text) - len(unit)]) * SIZE_UNITS[unit])
+    except ValueError:
+        raise ArgumentTypeError(f"invalid size: {value!r}") from None
+    if size < 1:
+        raise ArgumentTypeError(f"size must be positive, got {value!r}")
+    return size
+
+
+def _answer_labels(value):
+    # Imported here so that --help does not load the parser module
+    from doctomood.process import parse_answer_labels
+
+    try:
+        parse_answer_labels(value)
+    except ValueError as e:
+        raise ArgumentTypeError(str(e)) from None
+    return value
+
+
+def _add_answer_labels_argument(parser):
+    parser.add_argument(
+        "--answer-labels",
+        type=_answer_labels,
+        default=None,
+        metavar="LABELS",
+        help=(
+            "Labels of answer lines, as ranges or single labels separated by "
+            "commas, e.g. a-f, 1-4, i-iv (default: a-d)"
+        ),
+    )
+
+
+def _add_formats_argument(parser):
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=["docx", "xml"],
+        default=["docx", "xml"],
+        help="Output formats to write (default: docx xml)",
+    )
+
+
+def _add_processing_arguments(parser):
+    """Add the options that control how input files are parsed."""
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_jobs,
+        default=1,
+        help="Number of worker processes used to parse input files (0 = all CPUs)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_false",
+        dest="cache",
+        help="Parse every input file again instead of reusing cached results",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Directory of the parse cache (default: ~/.cache/doctomood)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=256,
+        help="Size limit of the parse cache in MB; least recently used entries are evicted",
+    )
+    parser.add_argument(
+        "--extra-content-words",
+        nargs="+",
+        default=None,
+        metavar="WORD",
+        help="Words that start explanation/note lines (default: explicacion nota)",
+    )
+    _add_answer_labels_argument(parser)
+
+
 def get_parser():
     parser = ArgumentParser()
     parser.add_argument(
@@ -55,6 +218,181 @@ def get_parser():
         "--respect-name",
         action="store_true",
     )
-    defaults = parse_config()
-    parser.set_defaults(**defaults)
+    parser.add_argument(
+        "--max-questions-per-file",
+        type=_positive_int,
+        default=None,
+        metavar="N",
+        help="Split the output into numbered files of at most N questions",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=_byte_size,
+        default=None,
+        metavar="SIZE",
+        help="Split the output so that each Moodle XML file is at most SIZE "
+        "(e.g. 500000, 512K, 10M)",
+    )
+    _add_formats_argument(parser)
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Show progress bars of paragraphs read, questions parsed and bytes written",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the wall time, throughput and peak RSS of each file and stage",
+    )
+    parser.add_argument(
+        "--profile-json",
+        default=None,
+        metavar="PATH",
+        help="Write the profile as JSON to PATH ('-' for standard output)",
+    )
+    parser.add_argument(
+        "--parallel-export",
+        action="store_true",
+        help="Write the DOCX output in a separate process while writing the XML",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Stream questions from the input files to the outputs in batches, "
+            "so memory stays constant whatever the input size (no parse cache)"
+        ),
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=["drop", "flag"],
+        default=None,
+        help=(
+            "Find near-duplicate questions across the input files and drop them "
+            "(keeping the first one) or flag them in their extra content"
+        ),
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=_similarity,
+        default=None,
+        metavar="S",
+        help="Similarity (0-1) from which questions are near-duplicates (default: 0.75)",
+    )
+    parser.add_argument(
+        "--dedup-report",
+        default=None,
+        metavar="PATH",
+        help="Write the near-duplicate clusters as JSON to PATH ('-' for standard output)",
+    )
+    _add_processing_arguments(parser)
+    _set_config_defaults(parser)
+    return parser
+
+
+def get_watch_parser():
+    parser = ArgumentParser(
+        prog="doctomood watch",
+        description="Watch input files and regenerate the outputs when they change.",
+    )
+    parser.add_argument(
+        "input",
+        type=str,
+        nargs="+",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        required=False,
+    )
+    parser.add_argument(
+        "--no-write",
+        action="store_false",
+        dest="write",
+    )
+    parser.add_argument(
+        "--name",
+        default="watch",
+        help="Output files are named questions_<name>.docx/.xml (default: watch)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between two scans of the input files (default: 1)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.5,
+        help="Seconds the inputs must stay unchanged before an update (default: 0.5)",
+    )
+    _add_formats_argument(parser)
+    _add_processing_arguments(parser)
+    _set_config_defaults(parser)
+    return parser
+
+
+def get_serve_parser():
+    parser = ArgumentParser(
+        prog="doctomood serve",
+        description=(
+            "Serve conversions over HTTP: POST a DOCX file to /convert and get "
+            "Moodle XML back."
+        ),
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="TCP port to listen on (default: 8765)",
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=None,
+        help="Listen on this Unix socket instead of a TCP port",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=_jobs,
+        default=0,
+        help="Number of preforked worker processes (default: 0 = all CPUs)",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=None,
+        help="Requests that may wait for a free worker; further requests get "
+        "503 (default: 2 per worker)",
+    )
+    parser.add_argument(
+        "--max-upload",
+        type=_byte_size,
+        default=50 * 1024**2,
+        metavar="SIZE",
+        help="Largest accepted upload; larger ones get 413 (default: 50M)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60.0,
+        help="Seconds a conversion may take before the request gets 504 (default: 60)",
+    )
+    parser.add_argument(
+        "--extra-content-words",
+        nargs="+",
+        default=None,
+        metavar="WORD",
+        help="Words that start explanation/note lines (default: explicacion nota)",
+    )
+    _add_answer_labels_argument(parser)
+    _set_config_defaults(parser)
     return parser
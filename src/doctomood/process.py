@@ -1,30 +1,22 @@
+import hashlib
 import re
 import unicodedata
-from itertools import zip_longest
 
-import docx
-import pandas as pd
-
-from doctomood.ioutils import get_docx_with_highlight_mark
+from doctomood.ioutils import iter_docx_with_highlight_mark
+from doctomood.profiling import CLASSIFY, READ, SPLIT, FileProfile
+from doctomood.progress import PARAGRAPHS, QUESTIONS, Cancelled, counted
+from doctomood.questions import MAX_ANSWERS, N_ANSWERS, Question, QuestionBank
 
+# Bump whenever a change to the parser changes its output, to invalidate caches
+PARSER_VERSION = "4"
 MIN_QUESTION_LENGTH = 12
 MAX_QUESTION_DIGIT_FRACTION = 0.32
 RE_QUESTION_MARK = re.compile(r"\d+\s*\b")
 # RE_REPL_QUESTION = re.compile(r"^(\d+)(?:[.\)\-\s])*(?=\b)")
 RE_REPL_QUESTION = re.compile(r"^(\d+)(?:[.\)\-\s])*(?=\b|¿)")
-RE_REPL_ANSWER = [
-    re.compile(r"^([a-d])(?:[.\)\-\s])*(?=\b)"),
-    # re.compile(r"^-*\s*(?=\b)"),
-    re.compile(r"^-*\s*"),
-]
-RE_ANSWER_MARK = re.compile(r"^([a-d])(?:[.\)\-\s]+)(?=\w|$)", re.IGNORECASE)
-RE_ANSWER_MARK_SPACE_ONLY = re.compile(r"^([a-d])\s+(?=\w)", re.IGNORECASE)
-RE_REPL_ANSWER_SPACE_ONLY = re.compile(r"^([a-d])\s+", re.IGNORECASE)
 EXTRA_CONTENT_WORDS = ["explicacion", "nota"]
-
-
-def _right_pad(lst, length=4):
-    return lst + [""] * (length - len(lst))
+# Blocks per task when the blocks of one document are classified in parallel
+CLASSIFY_CHUNK_BLOCKS = 2048
 
 
 def _matches_question_criteria(p: str) -> bool:
@@ -38,138 +30,133 @@ def _matches_question_criteria(p: str) -> bool:
     )
 
 
-def _get_correct_answers(answers):
-    if any(el.endswith("[HIGHLIGHTED]") for el in answers):
-        correct = list(map(lambda x: x.endswith("[HIGHLIGHTED]"), answers)).index(True)
-        answers = [str.removesuffix(element, " [HIGHLIGHTED]") for element in answers]
-    elif any(el.startswith("✔") for el in answers):
-        correct = list(map(lambda x: x.startswith("✔"), answers)).index(True)
-        answers = [str.removeprefix(element, "✔") for element in answers]
-    else:
-        correct = -1
-    return answers, correct
+HIGHLIGHT_MARK = " [HIGHLIGHTED]"
+CHECK_MARK = "✔"
 
 
-def _is_answer_line(line: str) -> bool:
-    """Check if a line starts with an answer marker (a, b, c, d)."""
-    return RE_ANSWER_MARK.match(line.strip()) is not None
+def _split_correct_mark(line):
+    """
+    Return (line without its correct answer mark, mark), where mark is
+    HIGHLIGHT_MARK, CHECK_MARK or None.
+    """
+    if line.endswith(HIGHLIGHT_MARK):
+        return line[: -len(HIGHLIGHT_MARK)], HIGHLIGHT_MARK
+    if line.startswith(CHECK_MARK):
+        return line[len(CHECK_MARK) :].lstrip(), CHECK_MARK
+    return line, None
 
 
-def _extract_answer_letter(line: str):
-    """
-    Extract the answer letter (a, b, c, d) from a line if it matches RE_ANSWER_MARK.
+def _correct_index(marks):
+    """Index of the first highlighted answer, else of the first checked one, or -1."""
+    for mark in (HIGHLIGHT_MARK, CHECK_MARK):
+        if mark in marks:
+            return marks.index(mark)
+    return -1
+
+
+ANSWER_LABELS = "a-d"
+ROMAN_NUMERALS = [(10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i")]
 
-    Returns:
-        tuple: (letter, is_space_only) or (None, None) if no match
-            - letter: lowercase letter (a-d)
-            - is_space_only: True if matched space-only format, False if punctuation format
-    """
-    line_stripped = line.strip()
-    # Check space-only format first
-    match_space = RE_ANSWER_MARK_SPACE_ONLY.match(line_stripped)
-    if match_space:
-        return match_space.group(1).lower(), True
 
-    # Check regular format with punctuation
-    match = RE_ANSWER_MARK.match(line_stripped)
-    if match:
-        return match.group(1).lower(), False
+def _roman(n):
+    digits = []
+    for value, numeral in ROMAN_NUMERALS:
+        count, n = divmod(n, value)
+        digits.append(numeral * count)
+    return "".join(digits)
 
-    return None, None
 
+ROMAN_VALUES = {_roman(n): n for n in range(1, 40)}
 
-def _validate_answer_marks(candidate_lines):
+
+def parse_answer_labels(spec):
     """
-    Validate answer marks across all candidate lines.
+    Return the answer labels of a label set spec, lowercased.
 
-    Returns:
-        tuple: (is_valid, answer_indices, answer_letters, is_space_only_format)
-            - is_valid: True if all marks are valid (no duplicates, all are a-d)
-            - answer_indices: List of indices (relative to candidates) that have valid marks
-            - answer_letters: List of extracted letters (lowercase)
-            - is_space_only_format: True if all answers use space-only format (no punctuation)
+    spec is a comma separated list of ranges or single labels: letters
+    (a-f), numbers (1-4) or lowercase Roman numerals (i-iv). A range whose
+    ends are both Roman numerals, such as i-v, is a range of Roman numerals.
+
+    Raises:
+        ValueError: If a range is invalid or empty
     """
-    answer_indices = []
-    answer_letters = []
-    space_only_flags = []
+    labels = []
+    for part in spec.lower().replace(" ", "").split(","):
+        first, sep, last = part.partition("-")
+        if not sep:
+            if not part:
+                raise ValueError(f"Empty answer label in {spec!r}")
+            labels.append(part)
+            continue
+        if first.isdigit() and last.isdigit():
+            values = range(int(first), int(last) + 1)
+            labels.extend(str(n) for n in values)
+        elif first in ROMAN_VALUES and last in ROMAN_VALUES:
+            # Before letters: i-v and i-x are Roman numerals, not i, j, k, …
+            values = range(ROMAN_VALUES[first], ROMAN_VALUES[last] + 1)
+            labels.extend(_roman(n) for n in values)
+        elif len(first) == len(last) == 1 and first.isalpha() and last.isalpha():
+            values = range(ord(first), ord(last) + 1)
+            labels.extend(chr(c) for c in values)
+        else:
+            raise ValueError(f"Invalid answer label range {part!r}")
+        if not values:
+            raise ValueError(f"Empty answer label range {part!r}")
+    return labels
 
-    for i, line in enumerate(candidate_lines):
-        letter, is_space_only = _extract_answer_letter(line)
-        if letter is not None:
-            answer_indices.append(i)
-            answer_letters.append(letter)
-            space_only_flags.append(is_space_only)
 
-    # Check for duplicates
-    if len(answer_letters) != len(set(answer_letters)):
-        return False, [], [], False
+class AnswerPattern:
+    """
+    Compiled pattern that classifies and strips answer lines in one match.
 
-    # Must have at least one valid answer mark
-    if not answer_letters:
-        return False, [], [], False
+    An answer line starts with a label (case insensitive) followed by spaces
+    ("a text") or by punctuation ("a) text", "a. text", "a- text"). All
+    labels are in a single alternation, so the cost of a match does not
+    depend on the number of labels. The same match tells where the answer
+    text starts; lines without a label only lose their leading dashes.
 
-    # Check if all answers use space-only format
-    is_space_only_format = all(space_only_flags) if space_only_flags else False
+    max_answers is the most answers of a question: one per label, at least
+    N_ANSWERS and at most MAX_ANSWERS.
+    """
 
-    return True, answer_indices, answer_letters, is_space_only_format
+    __slots__ = ("labels", "regex", "max_answers")
+
+    def __init__(self, labels=ANSWER_LABELS):
+        if isinstance(labels, str):
+            labels = parse_answer_labels(labels)
+        self.labels = tuple(dict.fromkeys(label.lower() for label in labels))
+        self.max_answers = min(MAX_ANSWERS, max(N_ANSWERS, len(self.labels)))
+        single = "".join(label for label in self.labels if len(label) == 1)
+        # Longest labels first, so that "iii" is not tried as "i"
+        alternatives = sorted(
+            (re.escape(label) for label in self.labels if len(label) > 1),
+            key=len,
+            reverse=True,
+        )
+        if single:
+            alternatives.append(f"[{re.escape(single)}]")
+        label = "|".join(alternatives)
+        self.regex = re.compile(
+            rf"(?P<space>{label})\s+(?=\w)"
+            rf"|(?P<punct>{label})[.\)\-\s]+(?=\w|$)"
+            r"|-+\s*",
+            re.IGNORECASE,
+        )
 
+    def match(self, line):
+        """
+        Return (label, start) for a stripped line, where label is the
+        lowercased answer label, or None if the line is not labeled, and
+        line[start:] is the text without the label.
+        """
+        m = self.regex.match(line)
+        if m is None:
+            return None, 0
+        group = m.lastgroup
+        return (m.group(group).lower() if group else None), m.end()
 
-def find_blocks(paragraphs):
-    """
-    Find blocks separated by double (or more) newlines.
-    This function ONLY detects where blocks are - it does NOT analyze content.
 
-    Returns:
-        blocks: list[list[str]]  # Each block is a list of paragraph text lines
-    """
-    blocks = []
-    i = 0
-    n = len(paragraphs)
-
-    while i < n:
-        # Count empty lines before potential block
-        empty_before = 0
-        while i < n and not paragraphs[i].strip():
-            empty_before += 1
-            i += 1
-
-        # If we've reached the end, break
-        if i >= n:
-            break
-
-        # Start of a potential block
-        block_start = i
-        block_lines = []
-
-        # Collect consecutive non-empty lines (the block)
-        while i < n and paragraphs[i].strip():
-            block_lines.append(paragraphs[i])
-            i += 1
-
-        # Count empty lines after the block
-        empty_after = 0
-        j = i
-        while j < n and not paragraphs[j].strip():
-            empty_after += 1
-            j += 1
-
-        # Block is valid if separated by 2+ newlines (double newline)
-        # Blocks at start/end are also valid
-        is_at_start = block_start == 0
-        is_at_end = i >= n
-        has_double_newline_before = empty_before >= 1
-        has_double_newline_after = empty_after >= 1
-
-        if (
-            has_double_newline_before
-            or has_double_newline_after
-            or is_at_start
-            or is_at_end
-        ):
-            if block_lines:  # Only add non-empty blocks
-                blocks.append(block_lines)
-
-    return blocks
+DEFAULT_ANSWER_PATTERN = AnswerPattern(ANSWER_LABELS)
 
 
 def _normalize_text(text: str) -> str:
@@ -179,157 +166,690 @@ def _normalize_text(text: str) -> str:
     return "".join(c for c in nfd if unicodedata.category(c) != "Mn").lower()
 
 
-def _starts_with_extra_content_word(text: str) -> bool:
-    """Check if text starts with any of the EXTRA_CONTENT_WORDS (case and accent insensitive)."""
-    text_normalized = _normalize_text(text.strip())
-    for word in EXTRA_CONTENT_WORDS:
-        if text_normalized.startswith(_normalize_text(word)):
-            return True
-    return False
+class ExtraContentMatcher:
+    """
+    Case and accent insensitive check for lines starting with extra content words.
+
+    The keywords are normalized once. Each line is checked on a prefix bounded
+    by the longest keyword: lines whose first letter cannot start a keyword are
+    rejected right away, and plain ASCII prefixes skip the Unicode
+    normalization entirely.
+    """
+
+    # Room for combining marks when a non-ASCII prefix is in decomposed form
+    PREFIX_SLACK = 4
 
+    __slots__ = ("words", "initials", "prefix_len")
 
-def post_process_blocks(blocks):
+    def __init__(self, words=EXTRA_CONTENT_WORDS):
+        normalized = {_normalize_text(word.strip()) for word in words}
+        self.words = tuple(sorted(word for word in normalized if word))
+        self.initials = frozenset(word[0] for word in self.words)
+        self.prefix_len = max(map(len, self.words), default=0)
+
+    def __call__(self, text: str) -> bool:
+        text = text.lstrip()
+        first = text[:1]
+        if first.isascii():
+            if first.lower() not in self.initials:
+                return False
+            prefix = text[: self.prefix_len]
+            if prefix.isascii():
+                return prefix.lower().startswith(self.words)
+        prefix = text[: self.prefix_len * self.PREFIX_SLACK]
+        return _normalize_text(prefix).startswith(self.words)
+
+
+DEFAULT_EXTRA_CONTENT_MATCHER = ExtraContentMatcher(EXTRA_CONTENT_WORDS)
+
+
+def iter_blocks(paragraphs, matcher=DEFAULT_EXTRA_CONTENT_MATCHER):
     """
-    Merge blocks that start with EXTRA_CONTENT_WORDS into the previous block.
-    Note: This function only works with block indices. Content checking is done
-    in process() where paragraphs are available.
+    Split paragraphs into question blocks in a single pass.
 
-    Args:
-        blocks: list[list[int]]  # List of blocks (each block is list of paragraph indices)
+    Blocks are runs of non-empty stripped lines, and a block whose first line
+    starts with one of the EXTRA_CONTENT_WORDS is merged into the previous
+    block.
 
-    Returns:
-        list[list[int]]  # Processed blocks
+    Yields:
+        list[str]: The stripped lines of each block
     """
-    # This function is called from process() after checking content
-    # For now, just return blocks as-is - merging happens in process()
-    return blocks
+    block = []
+    after_gap = False
+    for paragraph in paragraphs:
+        line = paragraph.strip()
+        if not line:
+            after_gap = True
+            continue
+        if after_gap and block and not matcher(line):
+            yield block
+            block = []
+        block.append(line)
+        after_gap = False
+    if block:
+        yield block
+
+
+def classify_block(
+    block, matcher=DEFAULT_EXTRA_CONTENT_MATCHER, answer_pattern=DEFAULT_ANSWER_PATTERN
+):
+    """
+    Classify the lines of a block into question, answers, correct answer and extra.
+
+    The question is the first line; labeled lines among the next
+    answer_pattern.max_answers lines are the answers (or the 2nd to 5th lines
+    if the labels are missing or repeated), and everything else is extra
+    content. Answer labels are those of answer_pattern (default: a-d, so
+    up to four answers). Answers are not padded: a question has as many as
+    were found.
+    """
+    n_lines = len(block)
+    question = block[0]
+
+    # Candidate answer lines are the lines after the question, one per
+    # possible answer. Each is matched once, after removing its correct
+    # answer mark: the match gives its label and where its text starts.
+    candidate_lines = block[1 : 1 + answer_pattern.max_answers]
+    texts, correct_marks = [], []
+    for line in candidate_lines:
+        text, mark = _split_correct_mark(line)
+        texts.append(text)
+        correct_marks.append(mark)
+    marks = [answer_pattern.match(text) for text in texts]
+    labels = [label for label, _ in marks if label is not None]
+
+    if labels and len(labels) == len(set(labels)):
+        # Use only labeled candidate lines as answers
+        is_answer = [label is not None for label, _ in marks]
+        # Answers end after the last labeled answer (block index = candidate + 1)
+        answer_end_idx = max(i for i, answer in enumerate(is_answer) if answer) + 2
+    else:
+        # No marks or duplicated marks: assume positions 2–5 are answers
+        n_answers = min(N_ANSWERS, len(candidate_lines))
+        is_answer = [j < n_answers for j in range(len(candidate_lines))]
+        answer_end_idx = n_answers + 1
 
+    answers = []
+    answer_marks = []
+    for text, (_, start), mark, answer in zip(texts, marks, correct_marks, is_answer):
+        if answer:
+            answers.append(text[start:].strip())
+            answer_marks.append(mark)
+    correct = _correct_index(answer_marks)
 
-def process(paragraphs, as_dataframe=True):
-    paragraphs = [p.strip() for p in paragraphs]
+    question = question[_question_number_end(question) :].strip()
 
-    # Find all blocks separated by double newlines
-    blocks = find_blocks(paragraphs)
+    # Extra content:
+    # - Any non-answer line among the candidate lines
+    # - Any line after the answers
+    # - Any answer line that starts with EXTRA_CONTENT_WORDS
+    extra_lines = []
+    for i in range(1, n_lines):
+        line = block[i]
+        if i <= len(candidate_lines) and not is_answer[i - 1]:
+            extra_lines.append(line)
+        elif i >= answer_end_idx or matcher(line):
+            extra_lines.append(line)
+
+    return Question(question, tuple(answers), correct, "\n".join(extra_lines))
 
-    # Merge blocks that start with EXTRA_CONTENT_WORDS into the previous block
-    processed_blocks = []
-    for i, block in enumerate(blocks):
-        if i == 0:
-            # First block always stays as is
-            processed_blocks.append(block)
-        else:
-            # Check if current block starts with an extra content word
-            if block and _starts_with_extra_content_word(block[0]):
-                # Merge with previous block
-                processed_blocks[-1] = processed_blocks[-1] + block
-            else:
-                # Keep as separate block
-                processed_blocks.append(block)
 
-    blocks = post_process_blocks(processed_blocks)
+def _question_number_end(question):
+    m = RE_REPL_QUESTION.match(question)
+    return m.end() if m else 0
 
-    parts = []
+
+def _get_answer_pattern(answer_labels):
+    if answer_labels is None:
+        return DEFAULT_ANSWER_PATTERN
+    return AnswerPattern(answer_labels)
+
+
+def max_answers(answer_labels=None):
+    """Return the most answers a question can have with a label set."""
+    return _get_answer_pattern(answer_labels).max_answers
+
+
+def _get_matcher(extra_content_words):
+    if extra_content_words is None:
+        return DEFAULT_EXTRA_CONTENT_MATCHER
+    return ExtraContentMatcher(extra_content_words)
+
+
+def _parser_version(extra_content_words, answer_labels=None):
+    """Return the cache version of the parser for the given keywords and labels."""
+    if extra_content_words is None and answer_labels is None:
+        return PARSER_VERSION
+    words = "\n".join(_get_matcher(extra_content_words).words)
+    labels = ",".join(_get_answer_pattern(answer_labels).labels)
+    options = f"{words}\n\n{labels}" if answer_labels is not None else words
+    return f"{PARSER_VERSION}-{hashlib.sha1(options.encode()).hexdigest()[:12]}"
+
+
+def _classify_chunk(blocks, matcher, answer_pattern):
+    bank = QuestionBank()
     for block in blocks:
-        n_lines = len(block)
+        bank.append(classify_block(block, matcher, answer_pattern))
+    return bank
 
-        if n_lines == 0:
-            continue
 
-        question = block[0]
-
-        # Determine candidate answer lines (2nd to 5th lines in the block)
-        candidate_end = min(5, n_lines)
-        candidate_lines = block[1:candidate_end] if candidate_end > 1 else []
-        candidate_indices = list(range(1, candidate_end))
-
-        # Validate answer marks across all candidates
-        (
-            is_valid,
-            valid_answer_indices,
-            answer_letters,
-            is_space_only_format,
-        ) = _validate_answer_marks(candidate_lines)
-
-        answers = []
-        answer_indices = []
-
-        if is_valid:
-            # Use only validated labeled lines within 2–5 as answers
-            # Convert relative indices to absolute block indices
-            answer_indices = [candidate_indices[i] for i in valid_answer_indices]
-            answers = [block[i] for i in answer_indices]
-            # Only take up to 4 answers, right-pad if needed
-            answers = _right_pad(answers[:4], 4)
-        else:
-            # If validation fails (duplicates or no marks), fall back to regular behavior
-            # Assume positions 2–5 are answers
-            answers = candidate_lines
-            answer_indices = candidate_indices
-            is_space_only_format = False
-
-        answers, correct = _get_correct_answers(answers)
-
-        # Clean up question and answer text
-        question = re.sub(RE_REPL_QUESTION, "", question).strip()
-
-        # Use different cleaning logic based on format
-        if is_space_only_format:
-            # For space-only format, remove letter and space
-            answers = [
-                re.sub(RE_REPL_ANSWER_SPACE_ONLY, "", a).strip() for a in answers
-            ]
-        else:
-            # For regular format with punctuation, use existing cleaning
-            answers = [re.sub(RE_REPL_ANSWER[0], "", a).strip() for a in answers]
-            answers = [re.sub(RE_REPL_ANSWER[1], "", a).strip() for a in answers]
-
-        # Extra content:
-        # - Any non-answer line among the 2–5 candidate lines
-        # - Any line after the answers
-        # - Any line that starts with EXTRA_CONTENT_WORDS
-        extra_lines = []
-
-        # Determine where answers end
-        if answer_indices:
-            # Answers end after the last labeled answer
-            answer_end_idx = answer_indices[-1] + 1
-        else:
-            # If no labeled answers, assume answers are in positions 1-4
-            answer_end_idx = min(5, n_lines)
+def _iter_chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
-        # Collect extra content:
-        for i in range(1, n_lines):
-            # Non-answer candidate lines (within 2–5) are extra
-            if i in candidate_indices and i not in answer_indices:
-                extra_lines.append(block[i])
-                continue
 
-            # Lines after the answers are extra
-            if i >= answer_end_idx:
-                extra_lines.append(block[i])
-                continue
+def _classify_chunks(chunks, matcher, answer_pattern, jobs=1):
+    """
+    Classify chunks of blocks, yielding a QuestionBank per chunk in order.
+
+    Blocks are complete once split, so chunks of whole blocks can be
+    classified independently. With jobs other than 1, they are classified by
+    worker processes, with only a few chunks per worker in flight; a document
+    that fits in a single chunk is classified in this process without
+    starting any worker.
+    """
+    if jobs == 1:
+        for chunk in chunks:
+            yield _classify_chunk(chunk, matcher, answer_pattern)
+        return
+
+    import os
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import chain
+
+    first = next(chunks, None)
+    second = next(chunks, None)
+    if second is None:
+        if first is not None:
+            yield _classify_chunk(first, matcher, answer_pattern)
+        return
+
+    ahead = 2 * (jobs or os.cpu_count() or 1)
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=jobs or None)
+    try:
+        for chunk in chain([first, second], chunks):
+            future = executor.submit(_classify_chunk, chunk, matcher, answer_pattern)
+            pending.append(future)
+            while len(pending) >= ahead:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _collect(items, collected):
+    for item in items:
+        collected.append(item)
+        yield item
+
+
+def iter_question_batches(
+    paragraphs,
+    extra_content_words=None,
+    progress=None,
+    profile=None,
+    jobs=1,
+    batch_size=CLASSIFY_CHUNK_BLOCKS,
+    blocks=None,
+    answer_labels=None,
+):
+    """
+    Parse paragraphs into a stream of questions, batch_size at a time.
+
+    Paragraphs are pulled from the reader, split into blocks and classified
+    lazily: each QuestionBank of at most batch_size questions is yielded as
+    soon as its blocks are classified, so memory does not grow with the
+    input. The arguments are the same as for process(); if blocks is a list,
+    the blocks are appended to it.
+
+    Yields:
+        QuestionBank: The next questions, in input order
+    """
+    matcher = _get_matcher(extra_content_words)
+    answer_pattern = _get_answer_pattern(answer_labels)
+    paragraphs = counted(paragraphs, progress, PARAGRAPHS)
+    if profile is not None:
+        paragraphs = profile.iterate(paragraphs, READ)
+    block_stream = iter_blocks(paragraphs, matcher)
+    if profile is not None:
+        block_stream = profile.iterate(block_stream, SPLIT)
+    block_stream = counted(block_stream, progress, QUESTIONS)
+    if blocks is not None:
+        block_stream = _collect(block_stream, blocks)
+
+    chunks = _iter_chunks(block_stream, batch_size)
+    batches = _classify_chunks(chunks, matcher, answer_pattern, jobs)
+    if profile is not None:
+        batches = profile.iterate(batches, CLASSIFY)
+    for bank in batches:
+        if profile is not None:
+            profile.questions += len(bank)
+        yield bank
+
+
+def process(
+    paragraphs,
+    as_dataframe=True,
+    extra_content_words=None,
+    progress=None,
+    profile=None,
+    jobs=1,
+    answer_labels=None,
+    batch_size=CLASSIFY_CHUNK_BLOCKS,
+):
+    """
+    Parse paragraphs into questions.
+
+    Blocks are split, merged with their explanation blocks and classified in
+    a single pass over the paragraphs. extra_content_words overrides the
+    EXTRA_CONTENT_WORDS that mark explanation/note lines. progress is an
+    optional callback reporting paragraphs read and questions parsed (see
+    doctomood.progress). With a FileProfile, the time spent reading,
+    splitting and classifying is recorded in it (see doctomood.profiling).
+    answer_labels is the label set of answer lines (see AnswerPattern),
+    "a-d" by default.
 
-            # Any line that starts with EXTRA_CONTENT_WORDS (anywhere in block)
-            if _starts_with_extra_content_word(block[i]):
-                extra_lines.append(block[i])
+    With jobs other than 1 (None for one per CPU), the blocks of a large
+    document are classified in chunks of batch_size by worker processes
+    while the next ones are being split; the result is the same as with
+    jobs=1.
 
-        extra = "\n".join(extra_lines)
-        parts.append((question, *answers, correct, extra))
+    Use iter_question_batches() to get the questions as a stream instead.
+
+    Returns:
+        tuple: (questions, blocks) where questions is a DataFrame, or a
+            QuestionBank if as_dataframe is False
+    """
+    blocks = []
+    batches = iter_question_batches(
+        paragraphs,
+        extra_content_words=extra_content_words,
+        progress=progress,
+        profile=profile,
+        jobs=jobs,
+        batch_size=batch_size,
+        blocks=blocks,
+        answer_labels=answer_labels,
+    )
+    bank = QuestionBank.concat(batches)
 
     if as_dataframe:
-        df = pd.DataFrame(
-            parts,
-            columns=["question", "ans0", "ans1", "ans2", "ans3", "correct", "extra"],
-        )
-        return df, blocks
+        return bank.to_dataframe(), blocks
+
+    return bank, blocks
+
+
+def process_docx(
+    source,
+    as_dataframe=True,
+    extra_content_words=None,
+    progress=None,
+    jobs=1,
+    answer_labels=None,
+):
+    """
+    Parse the questions of one DOCX file.
+
+    source is a path, a binary file object, or the content of the file as
+    bytes, bytearray or memoryview, which is read in place: an upload does
+    not have to be written to a temporary file first. jobs is passed to
+    process() to classify a large document on several cores.
+
+    Returns:
+        The questions, as a DataFrame, or a QuestionBank if as_dataframe is
+        False
+    """
+    bank = _process_path(
+        source, extra_content_words, progress, jobs=jobs, answer_labels=answer_labels
+    )
+    return bank.to_dataframe() if as_dataframe else bank
+
+
+def _process_path(
+    path,
+    extra_content_words=None,
+    progress=None,
+    profile=None,
+    jobs=1,
+    answer_labels=None,
+):
+    pars = iter_docx_with_highlight_mark(path)
+    bank, _ = process(
+        pars,
+        as_dataframe=False,
+        extra_content_words=extra_content_words,
+        progress=progress,
+        profile=profile,
+        jobs=jobs,
+        answer_labels=answer_labels,
+    )
+    return bank
+
+
+def _profile_path(path, extra_content_words=None, answer_labels=None):
+    """Parse a file in a worker process, returning (bank, FileProfile)."""
+    profile = FileProfile(path)
+    bank = _process_path(
+        path, extra_content_words, profile=profile, answer_labels=answer_labels
+    )
+    profile.update_peak_rss()
+    return bank, profile
+
+
+def iter_process_files(
+    paths,
+    jobs=1,
+    cache=None,
+    extra_content_words=None,
+    progress=None,
+    profiles=None,
+    answer_labels=None,
+):
+    """
+    Parse several input files, yielding the questions of each as it is ready.
+
+    Arguments are the same as for process_multiple(). Files are yielded in
+    input order; with several jobs, only a few files per worker are parsed
+    ahead of the consumer, so results do not pile up in memory while e.g.
+    the previous file is being written.
+
+    A single path is parsed in this process, with the jobs classifying the
+    blocks of the document (see process()). Parsing in worker processes and
+    cache hits are reported to progress as whole files: questions only, once
+    each file is done.
+
+    If profiles is a list, a FileProfile with the time spent in each stage is
+    appended to it for each file, just before the file is yielded.
+
+    Yields:
+        tuple: (path, bank, error) for each path, where bank is a
+            QuestionBank, or None if the file failed with error
+    """
+    version = None
+    if cache is not None:
+        version = _parser_version(extra_content_words, answer_labels)
+
+    def lookup(path):
+        """Return (cache key, cached bank or None), raising OSError if unreadable."""
+        if cache is None:
+            return None, None
+        key = cache.key(path, version)
+        return key, cache.get(key)
+
+    def store(key, bank):
+        if cache is not None:
+            cache.put(key, bank)
+
+    paths = list(paths)
+    if jobs == 1 or len(paths) <= 1:
+        for path in paths:
+            profile = None if profiles is None else FileProfile(path)
+            bank = error = None
+            try:
+                key, bank = lookup(path)
+                if bank is None:
+                    # A single file gets the jobs to classify its blocks
+                    bank = _process_path(
+                        path,
+                        extra_content_words,
+                        progress,
+                        profile,
+                        jobs,
+                        answer_labels,
+                    )
+                    store(key, bank)
+                else:
+                    _cached(bank, progress, profile)
+            except Cancelled:
+                raise
+            except Exception as e:
+                bank, error = None, e
+            if profile is not None:
+                profile.error = error
+                profile.update_peak_rss()
+                profiles.append(profile)
+            yield path, bank, error
+        return
+
+    import os
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    worker = _process_path if profiles is None else _profile_path
+    # Not more files in flight than can be parsed at once, plus one queued each
+    ahead = 2 * (jobs or os.cpu_count() or 1)
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=jobs or None)
+    try:
+        for path in paths:
+            try:
+                key, bank = lookup(path)
+            except OSError as e:
+                pending.append((path, None, None, None, e))
+            else:
+                if bank is None:
+                    future = executor.submit(
+                        worker,
+                        path,
+                        extra_content_words,
+                        answer_labels=answer_labels,
+                    )
+                    pending.append((path, key, future, None, None))
+                else:
+                    pending.append((path, None, None, bank, None))
+            while len(pending) >= ahead:
+                yield _finish(pending.popleft(), store, progress, profiles)
+        while pending:
+            yield _finish(pending.popleft(), store, progress, profiles)
+    finally:
+        # Files not consumed yet, e.g. after a Cancelled, are not parsed
+        executor.shutdown(cancel_futures=True)
+
+
+def iter_stream_files(
+    paths,
+    jobs=1,
+    extra_content_words=None,
+    progress=None,
+    profiles=None,
+    batch_size=CLASSIFY_CHUNK_BLOCKS,
+    answer_labels=None,
+):
+    """
+    Parse input files as a stream of question batches, with bounded memory.
 
-    return parts, blocks
+    Like iter_process_files(), but the files are read one after the other,
+    and their questions are yielded batch_size at a time as soon as they are
+    classified (see iter_question_batches()): neither a whole file nor a
+    whole input set is ever held in memory. jobs classify the batches of
+    each file in worker processes. There is no parse cache.
 
+    If profiles is a list, the FileProfile of each file is appended to it
+    before the first batch of the file is yielded.
 
-def process_multiple(paths):
-    dfs = []
+    Yields:
+        tuple: (path, bank, error) for each batch of questions, where bank
+            is a QuestionBank; a file that fails yields (path, None, error)
+            after the batches read before the error
+    """
     for path in paths:
-        pars = get_docx_with_highlight_mark(path)
-        df, _ = process(pars)
-        dfs.append(df)
-    return pd.concat(dfs, ignore_index=True)
+        profile = None
+        if profiles is not None:
+            profile = FileProfile(path)
+            profiles.append(profile)
+        try:
+            batches = iter_question_batches(
+                iter_docx_with_highlight_mark(path),
+                extra_content_words=extra_content_words,
+                progress=progress,
+                profile=profile,
+                jobs=jobs,
+                batch_size=batch_size,
+                answer_labels=answer_labels,
+            )
+            for bank in batches:
+                yield path, bank, None
+        except Cancelled:
+            raise
+        except Exception as e:
+            if profile is not None:
+                profile.error = e
+            yield path, None, e
+        if profile is not None:
+            profile.update_peak_rss()
+
+
+def _cached(bank, progress, profile):
+    """Report a bank found in the cache."""
+    if progress is not None:
+        progress(QUESTIONS, len(bank))
+    if profile is not None:
+        profile.cached = True
+        profile.questions = len(bank)
+
+
+def _finish(entry, store, progress, profiles):
+    """Resolve an iter_process_files() entry of (path, key, future, bank, error)."""
+    path, key, future, bank, error = entry
+    profile = None if profiles is None else FileProfile(path)
+    if future is not None:
+        try:
+            bank = future.result()
+        except Exception as e:
+            error = e
+        else:
+            if profiles is not None:
+                bank, profile = bank
+            store(key, bank)
+            if progress is not None:
+                progress(QUESTIONS, len(bank))
+    elif bank is not None:
+        _cached(bank, progress, profile)
+    if profile is not None:
+        profile.error = error
+        profile.update_peak_rss()
+        profiles.append(profile)
+    return path, bank, error
+
+
+def process_files(
+    paths,
+    jobs=1,
+    cache=None,
+    extra_content_words=None,
+    progress=None,
+    answer_labels=None,
+):
+    """
+    Parse several input files, keeping the questions of each file separate.
+
+    Arguments are the same as for process_multiple().
+
+    Returns:
+        tuple: (banks, errors) where banks holds one QuestionBank per path, in
+            input order (None for files that failed), and errors is a list of
+            (path, exception) for those files
+    """
+    banks = []
+    errors = []
+    results = iter_process_files(
+        paths,
+        jobs=jobs,
+        cache=cache,
+        extra_content_words=extra_content_words,
+        progress=progress,
+        answer_labels=answer_labels,
+    )
+    for path, bank, error in results:
+        banks.append(bank)
+        if error is not None:
+            errors.append((path, error))
+    return banks, errors
+
+
+def process_multiple(
+    paths,
+    jobs=1,
+    return_errors=False,
+    cache=None,
+    as_dataframe=True,
+    extra_content_words=None,
+    progress=None,
+    answer_labels=None,
+    dedup=None,
+    dedup_threshold=None,
+    return_clusters=False,
+):
+    """
+    Parse several input files and combine their questions.
+
+    Args:
+        paths: Iterable of input file paths
+        jobs: Number of worker processes. 1 parses serially in this process,
+            None uses one worker per CPU.
+        return_errors: If True, also return the errors collected per file
+        cache: Optional QuestionCache. Files whose content and parser version
+            are already cached are not parsed again.
+        as_dataframe: If False, return a QuestionBank instead of a DataFrame
+        extra_content_words: Keywords marking explanation/note lines
+            (default: EXTRA_CONTENT_WORDS)
+        progress: Optional callback reporting paragraphs read and questions
+            parsed (see doctomood.progress); it may raise Cancelled to stop
+        answer_labels: Label set of answer lines, e.g. "a-f", "1-4" or
+            "i-iv" (default: ANSWER_LABELS)
+        dedup: "drop" or "flag" to drop or flag the near-duplicate questions
+            of the combined files (see doctomood.dedup). None keeps every
+            question.
+        dedup_threshold: Similarity (0-1) from which questions are
+            near-duplicates (default: DEDUP_THRESHOLD)
+        return_clusters: If True, also return the near-duplicate clusters
+            found with dedup, as lists of indices of the combined questions
+            before deduplication (see doctomood.dedup.find_duplicates)
+
+    Returns:
+        The questions of all files, in input order, or a tuple
+        (questions, errors) if return_errors is True, (questions, clusters)
+        if return_clusters is True, or (questions, errors, clusters) if both
+        are. errors is a list of (path, exception) for the files that could
+        not be processed; those files are skipped instead of aborting the
+        whole batch. clusters is empty without dedup.
+    """
+    banks, errors = process_files(
+        paths,
+        jobs=jobs,
+        cache=cache,
+        extra_content_words=extra_content_words,
+        progress=progress,
+        answer_labels=answer_labels,
+    )
+
+    # Banks are combined in input order, whatever order they were parsed in
+    questions = QuestionBank.concat(bank for bank in banks if bank is not None)
+    clusters = []
+    if dedup is not None:
+        from doctomood.dedup import DEDUP_THRESHOLD, deduplicate
+
+        if dedup_threshold is None:
+            dedup_threshold = DEDUP_THRESHOLD
+        questions, clusters = deduplicate(questions, dedup, dedup_threshold)
+    if as_dataframe:
+        questions = questions.to_dataframe()
+
+    if not return_errors:
+        for path, error in errors:
+            print(f"Skipped {path}: {error}")
+    result = (questions,)
+    if return_errors:
+        result += (errors,)
+    if return_clusters:
+        result += (clusters,)
+    return result if len(result) > 1 else questions
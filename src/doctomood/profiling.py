@@ -0,0 +1,177 @@
+import sys
+from contextlib import nullcontext
+from time import perf_counter
+
+READ = "read"
+SPLIT = "split"
+CLASSIFY = "classify"
+EXPORT_DOCX = "export_docx"
+EXPORT_XML = "export_xml"
+STAGES = (READ, SPLIT, CLASSIFY, EXPORT_DOCX, EXPORT_XML)
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes, or None."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class FileProfile:
+    """
+    Wall time spent in each conversion stage of one input file.
+
+    Stages can nest (the block splitter pulls paragraphs from the reader);
+    each stage is only charged for its own time, not for the nested ones.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.times = dict.fromkeys(STAGES, 0.0)
+        self.paragraphs = 0
+        self.questions = 0
+        self.cached = False
+        self.error = None
+        self.peak_rss = None
+        self._stack = []
+        self._since = 0.0
+
+    def _enter(self, name):
+        now = perf_counter()
+        if self._stack:
+            self.times[self._stack[-1]] += now - self._since
+        self._stack.append(name)
+        self._since = now
+
+    def _exit(self):
+        now = perf_counter()
+        self.times[self._stack.pop()] += now - self._since
+        self._since = now
+
+    def stage(self, name):
+        """Context manager charging the time spent in its block to a stage."""
+        return _Stage(self, name)
+
+    def iterate(self, iterable, name):
+        """Yield the items of iterable, charging the time to produce them to a stage."""
+        iterator = iter(iterable)
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            if name == READ:
+                self.paragraphs += 1
+            yield item
+
+    def update_peak_rss(self):
+        rss = peak_rss()
+        if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+            self.peak_rss = rss
+
+    def as_dict(self):
+        stages = {}
+        for name, seconds in self.times.items():
+            stages[name] = {
+                "seconds": seconds,
+                "paragraphs_per_sec": _rate(self.paragraphs, seconds),
+                "questions_per_sec": _rate(self.questions, seconds),
+            }
+        return {
+            "path": self.path,
+            "paragraphs": self.paragraphs,
+            "questions": self.questions,
+            "cached": self.cached,
+            "error": None if self.error is None else str(self.error),
+            "peak_rss_bytes": self.peak_rss,
+            "stages": stages,
+        }
+
+
+class _Stage:
+    __slots__ = ("profile", "name")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile._enter(self.name)
+
+    def __exit__(self, *exc_info):
+        self.profile._exit()
+
+
+def stage(profile, name):
+    """Return profile.stage(name), or a no-op context manager if profile is None."""
+    return nullcontext() if profile is None else profile.stage(name)
+
+
+def _rate(count, seconds):
+    return count / seconds if count and seconds > 0 else None
+
+
+def _total(profiles):
+    total = FileProfile("TOTAL")
+    for profile in profiles:
+        for name, seconds in profile.times.items():
+            total.times[name] += seconds
+        total.paragraphs += profile.paragraphs
+        total.questions += profile.questions
+        if profile.peak_rss is not None:
+            total.peak_rss = max(total.peak_rss or 0, profile.peak_rss)
+    return total
+
+
+def profile_report(profiles):
+    """Return the profiles of all files and their total as a JSON-serializable dict."""
+    return {
+        "stages": list(STAGES),
+        "files": [profile.as_dict() for profile in profiles],
+        "total": _total(profiles).as_dict(),
+    }
+
+
+def _format_rate(rate):
+    return "-" if rate is None else f"{rate:,.0f}"
+
+
+def format_profile_table(profiles):
+    """Return a text table with one row per file and stage, and the totals."""
+    header = ("file", "stage", "wall s", "par/s", "q/s", "peak RSS MB")
+    rows = []
+    for profile in [*profiles, _total(profiles)]:
+        if profile.error is not None:
+            rows.append((profile.path, "failed", "", "", "", ""))
+            continue
+        rss = "-" if profile.peak_rss is None else f"{profile.peak_rss / 2**20:.1f}"
+        for name, seconds in profile.times.items():
+            if name in (READ, SPLIT, CLASSIFY) and profile.cached:
+                continue
+            rows.append(
+                (
+                    profile.path,
+                    name,
+                    f"{seconds:.3f}",
+                    _format_rate(_rate(profile.paragraphs, seconds)),
+                    _format_rate(_rate(profile.questions, seconds)),
+                    rss,
+                )
+            )
+        if profile.cached:
+            rows.append((profile.path, "(cached)", "", "", "", rss))
+
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    lines = []
+    for row in [header, *rows]:
+        cells = [row[0].ljust(widths[0]), row[1].ljust(widths[1])]
+        cells.extend(cell.rjust(width) for cell, width in zip(row[2:], widths[2:]))
+        lines.append("  ".join(cells).rstrip())
+    return "\n".join(lines)
@@ -0,0 +1,71 @@
+# Progress reporting shared by the CLI and the GUI.
+#
+# A progress callback is called as progress(stage, n) with the number n of
+# items done since its previous call for that stage: paragraphs read from the
+# input files, questions parsed, and bytes of DOCX/XML document written. A
+# callback can stop the conversion by raising Cancelled.
+
+PARAGRAPHS = "paragraphs"
+QUESTIONS = "questions"
+BYTES = "bytes"
+STAGES = (PARAGRAPHS, QUESTIONS, BYTES)
+
+# Items counted between two calls of the callback, to keep its overhead low
+REPORT_EVERY = 256
+
+
+class Cancelled(Exception):
+    """Raised by a progress callback to stop the conversion."""
+
+
+def counted(iterable, progress, stage, every=REPORT_EVERY):
+    """Yield the items of iterable, reporting them to progress every few items."""
+    if progress is None:
+        yield from iterable
+        return
+    n = 0
+    for item in iterable:
+        yield item
+        n += 1
+        if n == every:
+            progress(stage, n)
+            n = 0
+    if n:
+        progress(stage, n)
+
+
+class TqdmProgress:
+    """
+    Progress callback that shows one tqdm bar per stage.
+
+    Use as a context manager so that the bars are closed at the end.
+    """
+
+    UNITS = {PARAGRAPHS: "par", QUESTIONS: "q", BYTES: "B"}
+
+    def __init__(self, **tqdm_kwargs):
+        from tqdm import tqdm
+
+        self.bars = {
+            stage: tqdm(
+                desc=stage.capitalize(),
+                unit=self.UNITS[stage],
+                unit_scale=stage == BYTES,
+                position=position,
+                **tqdm_kwargs,
+            )
+            for position, stage in enumerate(STAGES)
+        }
+
+    def __call__(self, stage, n):
+        self.bars[stage].update(n)
+
+    def close(self):
+        for bar in self.bars.values():
+            bar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
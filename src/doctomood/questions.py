@@ -0,0 +1,238 @@
+import math
+from array import array
+from dataclasses import dataclass
+from itertools import count, pairwise, takewhile
+
+# Answers of a question in the default layout (ans0..ans3, DOCX columns A-D)
+N_ANSWERS = 4
+# Most answers the parser takes for one question
+MAX_ANSWERS = 10
+COLUMNS = ["question", "ans0", "ans1", "ans2", "ans3", "correct", "extra"]
+# Type code of answer offsets: unsigned 32-bit on all supported platforms
+OFFSET_TYPECODE = "I"
+
+
+def answer_columns(n):
+    """Return the DataFrame column names of n answers: ans0, ans1, …"""
+    return [f"ans{j}" for j in range(n)]
+
+
+@dataclass(slots=True)
+class Question:
+    """A parsed multiple-choice question.
+
+    answers holds as many answers as the question has (not padded);
+    correct is the 0-based index of the correct answer, or -1 if none is marked.
+    """
+
+    question: str
+    answers: tuple
+    correct: int = -1
+    extra: str = ""
+
+    def as_row(self):
+        """Return the question as a (question, ans0, …, ansN, correct, extra) tuple."""
+        return (self.question, *self.answers, self.correct, self.extra)
+
+
+class QuestionBank:
+    """
+    Compact column-oriented container of questions.
+
+    Questions are stored as parallel columns (texts in lists, correct indices in
+    an integer array) rather than as one object per question. Iterating or
+    indexing yields Question records; to_dataframe() converts to pandas only
+    when a caller asks for it.
+
+    Answers are variable-length: the answers of all questions are stored one
+    after another in answer_values, and the answers of question i are
+    answer_values[answer_offsets[i]:answer_offsets[i + 1]]. Memory grows with
+    the answers there are, without padding questions to a fixed width.
+    """
+
+    __slots__ = ("questions", "answer_values", "answer_offsets", "correct", "extra")
+
+    def __init__(self, questions=()):
+        self.questions = []
+        self.answer_values = []
+        self.answer_offsets = array(OFFSET_TYPECODE, [0])
+        self.correct = array("h")
+        self.extra = []
+        self.extend(questions)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._slice(*i.indices(len(self)))
+        question = self.questions[i]
+        if i < 0:
+            i += len(self.questions)
+        return Question(question, self.answers(i), self.correct[i], self.extra[i])
+
+    def _slice(self, start, stop, step):
+        if step != 1:
+            return type(self)(self[i] for i in range(start, stop, step))
+        stop = max(start, stop)
+        offsets = self.answer_offsets
+        first = offsets[start]
+        bank = type(self)()
+        bank.questions = self.questions[start:stop]
+        bank.answer_values = self.answer_values[first : offsets[stop]]
+        bank.answer_offsets = array(
+            OFFSET_TYPECODE, [offset - first for offset in offsets[start : stop + 1]]
+        )
+        bank.correct = self.correct[start:stop]
+        bank.extra = self.extra[start:stop]
+        return bank
+
+    def __iter__(self):
+        fields = zip(self.questions, self.iter_answers(), self.correct, self.extra)
+        for question, answers, correct, extra in fields:
+            yield Question(question, answers, correct, extra)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(<{len(self)} questions>)"
+
+    def answers(self, i):
+        """Return the answers of question i (0 <= i < len(self)) as a tuple."""
+        offsets = self.answer_offsets
+        return tuple(self.answer_values[offsets[i] : offsets[i + 1]])
+
+    def iter_answers(self):
+        """Iterate over the answers of each question, as tuples."""
+        values = self.answer_values
+        for start, stop in pairwise(self.answer_offsets):
+            yield tuple(values[start:stop])
+
+    def max_answers(self):
+        """Return the largest number of answers of a question (0 if empty)."""
+        return max(
+            (stop - start for start, stop in pairwise(self.answer_offsets)),
+            default=0,
+        )
+
+    def append(self, question):
+        self.questions.append(question.question)
+        self.answer_values.extend(question.answers)
+        self.answer_offsets.append(len(self.answer_values))
+        self.correct.append(question.correct)
+        self.extra.append(question.extra)
+
+    def extend(self, questions):
+        if isinstance(questions, QuestionBank):
+            self.questions.extend(questions.questions)
+            base = len(self.answer_values)
+            self.answer_values.extend(questions.answer_values)
+            offsets = questions.answer_offsets
+            self.answer_offsets.extend(
+                [offset + base for offset in offsets[1:]] if base else offsets[1:]
+            )
+            self.correct.extend(questions.correct)
+            self.extra.extend(questions.extra)
+            return
+        for question in questions:
+            self.append(question)
+
+    @classmethod
+    def concat(cls, banks):
+        result = cls()
+        for bank in banks:
+            result.extend(bank)
+        return result
+
+    def rows(self):
+        """Iterate over (question, ans0, …, ansN, correct, extra) tuples."""
+        fields = zip(self.questions, self.iter_answers(), self.correct, self.extra)
+        for question, answers, correct, extra in fields:
+            yield (question, *answers, correct, extra)
+
+    def to_dataframe(self):
+        """
+        Return the questions as a DataFrame with columns question, ans0, …,
+        correct and extra.
+
+        There are N_ANSWERS answer columns, or more if a question has more
+        answers; the cells of missing answers are missing values (None or
+        NaN, depending on the pandas version).
+        """
+        import pandas as pd
+
+        width = max(N_ANSWERS, self.max_answers())
+        padded = [
+            answers + (None,) * (width - len(answers))
+            for answers in self.iter_answers()
+        ]
+        answers = list(zip(*padded)) if padded else [()] * width
+
+        data = {"question": self.questions}
+        for name, column in zip(answer_columns(width), answers):
+            data[name] = list(column)
+        data["correct"] = self.correct.tolist()
+        data["extra"] = self.extra
+        return pd.DataFrame(data, columns=list(data))
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Return the questions of a DataFrame with the columns of to_dataframe().
+
+        A row has answers up to its last answer cell that is not missing
+        (None or NaN).
+        """
+        bank = cls()
+        bank.questions = [str(q) for q in df["question"].tolist()]
+        bank.answer_values, bank.answer_offsets = dataframe_answers(df)
+        bank.correct = array("h", _correct_values(df["correct"].tolist(), bank))
+        bank.extra = [e if isinstance(e, str) else "" for e in df["extra"].tolist()]
+        return bank
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def row_answers(values):
+    """
+    Return the answers of one row from its answer cells, as strings.
+
+    Missing cells (None or NaN) after the last answer are dropped, and
+    missing cells between answers become empty answers.
+    """
+    values = list(values)
+    while values and _is_missing(values[-1]):
+        values.pop()
+    return tuple("" if _is_missing(value) else str(value) for value in values)
+
+
+def dataframe_answer_columns(columns):
+    """Return the answer columns among columns: ans0, ans1, … up to the first gap."""
+    return list(takewhile(lambda name: name in columns, (f"ans{j}" for j in count())))
+
+
+def dataframe_answers(df):
+    """
+    Return the (answer values, answer offsets) of the rows of a DataFrame,
+    in the layout of QuestionBank.
+    """
+    names = dataframe_answer_columns(df.columns)
+    values = []
+    offsets = array(OFFSET_TYPECODE, [0])
+    for cells in zip(*(df[name].tolist() for name in names)):
+        values.extend(row_answers(cells))
+        offsets.append(len(values))
+    if not names:
+        offsets.extend([0] * len(df))
+    return values, offsets
+
+
+def _correct_values(values, bank):
+    for value, answers in zip(values, pairwise(bank.answer_offsets)):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            yield -1
+            continue
+        n_answers = answers[1] - answers[0]
+        yield int(value) if -1 < value < n_answers else -1
@@ -0,0 +1,387 @@
+import http.client
+import io
+import json
+import os
+import signal
+import socket
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import ParseError
+
+from doctomood import __version__
+
+XML_CONTENT_TYPE = "application/xml; charset=utf-8"
+DEFAULT_MAX_UPLOAD = 50 * 1024**2
+RETRY_LATER = {"Retry-After": "1"}
+
+# Errors of a conversion that mean the upload is not a valid DOCX file
+INVALID_DOCX_ERRORS = (zipfile.BadZipFile, KeyError, ParseError)
+
+
+def _warm_up():
+    """Import the conversion pipeline once per worker process."""
+    # Ctrl+C stops the server, which then shuts the workers down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import doctomood.ioutils  # noqa: F401
+    import doctomood.process  # noqa: F401
+
+
+def convert_bytes(data, extra_content_words=None, answer_labels=None):
+    """
+    Convert the bytes of a DOCX file to Moodle XML.
+
+    Returns:
+        tuple: (XML bytes, number of questions)
+    """
+    from doctomood.ioutils import write_xml
+    from doctomood.process import process_docx
+
+    bank = process_docx(
+        data,
+        as_dataframe=False,
+        extra_content_words=extra_content_words,
+        answer_labels=answer_labels,
+    )
+    output = io.BytesIO()
+    write_xml(bank, output)
+    return output.getvalue(), len(bank)
+
+
+class ConversionService:
+    """
+    Pool of preforked worker processes with the pipeline already imported.
+
+    At most workers + max_pending conversions are accepted at a time: the
+    extra ones wait for a free worker, and reserve() refuses any more, so
+    that a burst of requests cannot queue up unbounded work and memory. A
+    slot is only freed when its conversion is done, even if the request
+    timed out in the meantime.
+
+    If a worker dies (killed, out of memory), the pool is broken: its
+    pending conversions fail with BrokenProcessPool, and the next submit()
+    starts a new pool.
+    """
+
+    def __init__(
+        self,
+        workers=None,
+        max_pending=None,
+        timeout=60.0,
+        extra_content_words=None,
+        answer_labels=None,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        if max_pending is None:
+            max_pending = 2 * self.workers
+        self.capacity = self.workers + max_pending
+        self.timeout = timeout
+        self.extra_content_words = extra_content_words
+        self.answer_labels = answer_labels
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._pool_lock = threading.Lock()
+        self.restarts = 0
+        self._executor = self._start_pool()
+
+    def _start_pool(self):
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+        # Start every worker now instead of on the first requests
+        warm = [executor.submit(os.getpid) for _ in range(self.workers)]
+        for future in warm:
+            future.result()
+        return executor
+
+    def _replace_pool(self, broken):
+        """Start a new pool in place of the broken one, unless already done."""
+        with self._pool_lock:
+            if self._executor is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._start_pool()
+            self.restarts += 1
+
+    def reserve(self):
+        """Reserve a conversion slot; return False if the service is full."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self._in_flight += 1
+        return True
+
+    def release(self):
+        """Free a slot reserved with reserve() without submitting a conversion."""
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, data):
+        """
+        Convert DOCX bytes in a reserved slot; return a future of convert_bytes().
+
+        Raises:
+            BrokenProcessPool: If the pool broke and could not be replaced
+        """
+        args = (convert_bytes, data, self.extra_content_words, self.answer_labels)
+        executor = self._executor
+        try:
+            future = executor.submit(*args)
+        except BrokenProcessPool:
+            self._replace_pool(executor)
+            future = self._executor.submit(*args)
+        future.add_done_callback(lambda _: self.release())
+        return future
+
+    def status(self):
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "status": "ok",
+            "version": __version__,
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": in_flight,
+            "restarts": self.restarts,
+        }
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """
+    POST /convert with a DOCX file as body returns its Moodle XML, with the
+    number of questions in the X-Question-Count header. GET /health returns
+    the state of the service as JSON.
+    """
+
+    server_version = f"doctomood/{__version__}"
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message, headers=None, close=False):
+        headers = dict(headers or {})
+        if close:
+            # The body of a refused upload is not read: the connection is unusable
+            self.close_connection = True
+            headers["Connection"] = "close"
+        body = f"{message}\n".encode("utf-8")
+        self._send(status, body, "text/plain; charset=utf-8", headers)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/health":
+            self._send_error(404, "Not found")
+            return
+        body = json.dumps(self.server.service.status()).encode("utf-8")
+        self._send(200, body, "application/json")
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/convert":
+            self._send_error(404, "Not found", close=True)
+            return
+        length = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            self._send_error(411, "Content-Length required", close=True)
+            return
+        length = int(length)
+        if length > self.server.max_upload:
+            self._send_error(
+                413,
+                f"Upload too large: {length} > {self.server.max_upload} bytes",
+                close=True,
+            )
+            return
+
+        service = self.server.service
+        if not service.reserve():
+            self._send_error(503, "Server busy, retry later", RETRY_LATER, close=True)
+            return
+        try:
+            data = self.rfile.read(length)
+            future = service.submit(data)
+        except BrokenProcessPool:
+            service.release()
+            self._send_error(503, "No conversion workers, retry later", RETRY_LATER)
+            return
+        except BaseException:
+            service.release()
+            raise
+
+        try:
+            xml, count = future.result(timeout=service.timeout)
+        except FutureTimeoutError:
+            self._send_error(504, "Conversion timed out")
+        except BrokenProcessPool:
+            # A worker died; the next request starts a new pool
+            self._send_error(503, "Conversion worker crashed, retry later", RETRY_LATER)
+        except INVALID_DOCX_ERRORS as e:
+            self._send_error(400, f"Invalid DOCX file: {e}")
+        except Exception as e:
+            self._send_error(500, f"Conversion failed: {e}")
+        else:
+            self._send(200, xml, XML_CONTENT_TYPE, {"X-Question-Count": str(count)})
+
+
+class _UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler logs client_address[0]
+        return request, ("local", 0)
+
+
+def make_server(
+    service,
+    host="127.0.0.1",
+    port=8765,
+    socket_path=None,
+    max_upload=DEFAULT_MAX_UPLOAD,
+):
+    """
+    Create an HTTP server for a ConversionService, on a TCP port or a Unix socket.
+
+    Uploads larger than max_upload bytes are refused. Call serve_forever() on
+    the result to handle requests, each in its own thread.
+    """
+    if socket_path is not None:
+        socket_path = Path(socket_path)
+        if socket_path.is_socket():
+            socket_path.unlink()
+        server = _UnixHTTPServer(str(socket_path), ConversionHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ConversionHandler)
+    server.service = service
+    server.max_upload = max_upload
+    return server
+
+
+class ServerError(Exception):
+    """Error response of a doctomood server."""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = str(socket_path)
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class Client:
+    """
+    Client of a local `doctomood serve`, over TCP (url) or a Unix socket.
+
+    Example:
+        xml = Client("http://127.0.0.1:8765").convert("questions.docx")
+    """
+
+    def __init__(self, url="http://127.0.0.1:8765", socket_path=None, timeout=120.0):
+        self.url = urlsplit(url)
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _connection(self):
+        if self.socket_path is not None:
+            return _UnixHTTPConnection(self.socket_path, self.timeout)
+        return http.client.HTTPConnection(
+            self.url.hostname, self.url.port, timeout=self.timeout
+        )
+
+    def _request(self, method, path, body=None):
+        connection = self._connection()
+        try:
+            headers = {}
+            if body is not None:
+                headers["Content-Type"] = "application/octet-stream"
+            try:
+                connection.request(method, path, body=body, headers=headers)
+            except (BrokenPipeError, ConnectionResetError):
+                # The server refused the upload (413, 503) and closed the
+                # connection before reading it: its response is still readable
+                pass
+            response = connection.getresponse()
+            data = response.read()
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise ServerError(response.status, data.decode("utf-8", "replace").strip())
+        return response, data
+
+    def convert(self, docx):
+        """
+        Convert a DOCX file (path or bytes) and return its Moodle XML as bytes.
+
+        Raises:
+            ServerError: If the server refused or failed the conversion; a
+                status of 503 means it is busy and the request can be retried.
+        """
+        if not isinstance(docx, (bytes, bytearray, memoryview)):
+            docx = Path(docx).read_bytes()
+        _, xml = self._request("POST", "/convert", body=docx)
+        return xml
+
+    def health(self):
+        _, data = self._request("GET", "/health")
+        return json.loads(data)
+
+
+def main(argv=None):
+    from doctomood.parser import get_serve_parser
+
+    args = get_serve_parser().parse_args(argv)
+    service = ConversionService(
+        workers=args.workers,
+        max_pending=args.max_pending,
+        timeout=args.timeout,
+        extra_content_words=args.extra_content_words,
+        answer_labels=args.answer_labels,
+    )
+    server = make_server(
+        service,
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        max_upload=args.max_upload,
+    )
+    if args.socket is not None:
+        address = f"unix:{args.socket}"
+    else:
+        address = f"http://{args.host}:{server.server_address[1]}"
+    print(
+        f"Serving on {address} with {service.workers} worker(s) "
+        "(POST /convert, GET /health; Ctrl+C to stop)"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket is not None:
+            Path(args.socket).unlink(missing_ok=True)
@@ -0,0 +1,225 @@
+import os
+import time
+from glob import glob
+from pathlib import Path
+
+from doctomood.ioutils import write_docx, write_xml
+from doctomood.process import process_files
+from doctomood.questions import QuestionBank
+
+
+def expand_patterns(glob_patterns):
+    """Return the files matching the glob patterns, without duplicates."""
+    paths = []
+    seen = set()
+    for glob_pattern in glob_patterns:
+        for path in sorted(glob(glob_pattern)):
+            if path not in seen and os.path.isfile(path):
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class QuestionWatcher:
+    """
+    Keep the parsed questions of the files matching a set of globs up to date.
+
+    The questions of each file are kept in memory; update() only parses the
+    files that are new or whose modification time or size changed since the
+    previous update. Files in exclude, such as the outputs of the watcher,
+    are never watched even if they match a glob.
+    """
+
+    def __init__(
+        self,
+        glob_patterns,
+        jobs=1,
+        cache=None,
+        extra_content_words=None,
+        answer_labels=None,
+        exclude=(),
+    ):
+        self.glob_patterns = glob_patterns
+        self.exclude = {os.path.realpath(path) for path in exclude}
+        self.jobs = jobs
+        self.cache = cache
+        self.extra_content_words = extra_content_words
+        self.answer_labels = answer_labels
+        self.paths = []
+        self.signatures = {}
+        self.banks = {}
+
+    def snapshot(self):
+        """Return {path: (mtime_ns, size)} for the files currently matching."""
+        signatures = {}
+        for path in expand_patterns(self.glob_patterns):
+            if self.exclude and os.path.realpath(path) in self.exclude:
+                continue
+            try:
+                signatures[path] = _signature(path)
+            except FileNotFoundError:
+                continue
+        return signatures
+
+    def changes(self, snapshot):
+        """Return (changed, removed) paths of snapshot relative to the last update."""
+        changed = [p for p, sig in snapshot.items() if self.signatures.get(p) != sig]
+        removed = [p for p in self.signatures if p not in snapshot]
+        return changed, removed
+
+    def update(self, snapshot=None):
+        """
+        Re-parse the files that changed since the last update.
+
+        Returns:
+            tuple: (changed, removed, errors) where errors is a list of
+                (path, exception) for changed files that could not be parsed
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        changed, removed = self.changes(snapshot)
+
+        for path in removed:
+            self.banks.pop(path, None)
+
+        banks, errors = process_files(
+            changed,
+            jobs=self.jobs,
+            cache=self.cache,
+            extra_content_words=self.extra_content_words,
+            answer_labels=self.answer_labels,
+        )
+        for path, bank in zip(changed, banks):
+            if bank is None:
+                self.banks.pop(path, None)
+            else:
+                self.banks[path] = bank
+
+        self.paths = list(snapshot)
+        self.signatures = snapshot
+        return changed, removed, errors
+
+    def questions(self):
+        """Return the questions of all files, in the order of the glob patterns."""
+        return QuestionBank.concat(self.banks[p] for p in self.paths if p in self.banks)
+
+
+def write_outputs(questions, docs_output, xml_output):
+    """
+    Rewrite the outputs; a format whose path is None is skipped.
+
+    Each output is replaced only once it is complete, so readers never see a
+    partial file.
+    """
+    if docs_output is not None:
+        write_docx(questions, docs_output)
+    if xml_output is not None:
+        write_xml(questions, xml_output)
+
+
+def watch(
+    watcher,
+    docs_output,
+    xml_output,
+    interval=1.0,
+    debounce=0.5,
+    write=True,
+    max_updates=None,
+):
+    """
+    Poll the watched files and regenerate the outputs whenever some of them change.
+
+    A change is only processed once the files have stayed unchanged for
+    `debounce` seconds, so that an editor saving a file in several steps
+    triggers a single update.
+    """
+    updates = 0
+    pending_since = None
+    last_snapshot = None
+
+    while max_updates is None or updates < max_updates:
+        snapshot = watcher.snapshot()
+        changed, removed = watcher.changes(snapshot)
+
+        if updates and not (changed or removed):
+            pending_since = None
+            time.sleep(interval)
+            continue
+
+        now = time.monotonic()
+        if snapshot != last_snapshot:
+            # Still changing: restart the debounce period
+            last_snapshot = snapshot
+            pending_since = now
+        if updates and now - pending_since < debounce:
+            time.sleep(min(interval, debounce))
+            continue
+
+        started = time.perf_counter()
+        changed, removed, errors = watcher.update(snapshot)
+        for path, error in errors:
+            print(f"Failed to process {path}: {error}")
+
+        questions = watcher.questions()
+        if write:
+            write_outputs(questions, docs_output, xml_output)
+        print(
+            f"Updated {len(changed)} file(s), removed {len(removed)}: "
+            f"{len(questions)} questions from {len(watcher.banks)} file(s) "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        updates += 1
+        pending_since = None
+
+
+def main(argv=None):
+    from doctomood.cache import QuestionCache
+    from doctomood.parser import get_watch_parser
+
+    parser = get_watch_parser()
+    args = parser.parse_args(argv)
+    if args.output_dir is None:
+        parser.error("the following arguments are required: -o/--output-dir")
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    docs_output = output_dir / f"questions_{args.name}.docx"
+    xml_output = output_dir / f"questions_{args.name}.xml"
+    # Outputs of both formats are left out, whichever ones are written, so
+    # that inputs globbed from the output directory do not include them
+    outputs = [docs_output, xml_output]
+    if "docx" not in args.formats:
+        docs_output = None
+    if "xml" not in args.formats:
+        xml_output = None
+
+    cache = None
+    if args.cache:
+        cache = QuestionCache(
+            args.cache_dir, max_bytes=int(args.cache_max_mb * 1024 * 1024)
+        )
+
+    watcher = QuestionWatcher(
+        args.input,
+        jobs=args.jobs,
+        cache=cache,
+        extra_content_words=args.extra_content_words,
+        answer_labels=args.answer_labels,
+        exclude=outputs,
+    )
+    print(f"Watching {', '.join(args.input)} (Ctrl+C to stop)")
+    try:
+        watch(
+            watcher,
+            docs_output,
+            xml_output,
+            interval=args.interval,
+            debounce=args.debounce,
+            write=args.write,
+        )
+    except KeyboardInterrupt:
+        pass
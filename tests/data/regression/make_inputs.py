@@ -0,0 +1,221 @@
+"""
+Write the input DOCX files of the parser regression corpus.
+
+Usage:
+    python tests/data/regression/make_inputs.py
+
+The expected outputs of edge_cases.docx and synthetic.docx were produced by
+the parser as it was before the single-pass rewrite of process(), those of
+fixed.docx by the current parser; see README.md.
+"""
+
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parents[2] / "benchmarks"))
+
+from synthetic import make_question_bank  # noqa: E402
+
+# Each block is a list of paragraphs, a paragraph a list of (text, highlighted)
+# runs or a plain string; blocks are separated by one empty paragraph unless
+# they start with "" themselves.
+EDGE_CASES = [
+    # Labeled answers with the different label separators
+    [
+        "1. ¿Cuál es la capital de Francia?",
+        "a) Madrid",
+        [("b) ", False), ("París", True)],
+        "c) Roma",
+        "d) Berlín",
+    ],
+    [
+        "2) Indique la opción verdadera sobre el agua",
+        "a. Hierve a 50 grados",
+        "b. Es un elemento",
+        [("c. ", False), ("Es un compuesto", True)],
+        "d. Es un gas a 20 grados",
+    ],
+    [
+        "3 - Señale el número primo de la lista",
+        "a - 4",
+        "b - 6",
+        "c - 9",
+        [("d - ", False), ("7", True)],
+    ],
+    [
+        "4.¿Qué órgano bombea la sangre?",
+        [("a ", False), ("El corazón", True)],
+        "b El hígado",
+        "c El pulmón",
+        "d El riñón",
+    ],
+    # Unlabeled answers with a checkmark on the correct one
+    [
+        "5. ¿Qué planeta es el más grande del sistema solar?",
+        "Marte",
+        "✔Júpiter",
+        "Saturno",
+        "Venus",
+    ],
+    # Unlabeled highlighted answers
+    [
+        "6. ¿En qué año terminó la Segunda Guerra Mundial?",
+        "1939",
+        "1942",
+        [("1945", True)],
+        "1950",
+    ],
+    # Fewer than four labeled answers
+    [
+        "7. ¿Cuál de estos animales es un mamífero?",
+        "a) Tiburón",
+        [("b) Delfín", True)],
+        "c) Pulpo",
+    ],
+    [
+        "8. Una pregunta de verdadero o falso sobre la luna",
+        [("a) Verdadero", True)],
+        "b) Falso",
+    ],
+    # Extra lines after the answers and an explanation in the same block
+    [
+        "9. ¿Cuántos lados tiene un hexágono?",
+        "a) Cinco",
+        [("b) Seis", True)],
+        "c) Siete",
+        "d) Ocho",
+        "Un hexágono tiene seis lados.",
+        "Explicación: hex significa seis.",
+    ],
+    # Explanation and note blocks merged into the previous question
+    [
+        "10. ¿Qué gas respiran las plantas de noche?",
+        "a) Oxígeno",
+        "b) Nitrógeno",
+        [("c) ", False), ("Dióxido de carbono", True)],
+        "d) Helio",
+    ],
+    ["Explicación: las plantas respiran de noche.", "Segunda línea de la explicación"],
+    ["NOTA: pregunta revisada en 2024"],
+    ["explicacion sin tilde también cuenta"],
+    # A non-answer line among the candidate lines
+    [
+        "11. ¿Cuál es el resultado de 2 + 2?",
+        "a) 3",
+        "Pista: es un número par",
+        [("b) 4", True)],
+        "c) 5",
+    ],
+    # Duplicate labels fall back to the first four lines
+    [
+        "12. ¿Qué color resulta de mezclar azul y amarillo?",
+        "a) Verde",
+        "a) Rojo",
+        "b) Naranja",
+        "c) Morado",
+    ],
+    # A fifth labeled line is not a candidate
+    [
+        "13. ¿Qué instrumento tiene teclas blancas y negras?",
+        "a) Violín",
+        [("b) Piano", True)],
+        "c) Flauta",
+        "d) Tambor",
+        "e) Guitarra",
+    ],
+    # Paragraphs with surrounding whitespace and several empty paragraphs
+    [
+        "   14.   ¿Cuál es el océano más grande?   ",
+        "  a) Atlántico",
+        [("  b) ", False), ("Pacífico  ", True)],
+        "c) Índico  ",
+        "d) Ártico",
+    ],
+    [
+        "",
+        "",
+        "15. Pregunta tras varias líneas vacías seguidas en el texto",
+        "a) Primera",
+        "b) Segunda",
+        [("c) Tercera", True)],
+        "d) Cuarta",
+    ],
+    # Highlight on whitespace only does not mark the answer
+    [
+        "16. ¿Cuál es el metal más ligero?",
+        [("a) Litio", False), ("  ", True)],
+        "b) Hierro",
+        "c) Plomo",
+        "d) Oro",
+    ],
+]
+
+# Inputs whose output changed on purpose since the first release (see "Fixed"
+# in the changelog)
+FIXED_CASES = [
+    # A checkmark before the label marks the correct answer
+    [
+        "1. ¿Cuál es la capital de Italia?",
+        "a) Madrid",
+        "✔b) Roma",
+        "c) París",
+        "d) Lisboa",
+    ],
+    # Uppercase labels are removed from the answer text
+    [
+        "2. Indique el número mayor",
+        "A) Uno",
+        "B) Dos",
+        [("C) Tres", False)],
+        [("D) Cuatro", True)],
+    ],
+    # A label without text gives an empty answer
+    [
+        "3. ¿Qué respuesta no tiene texto?",
+        "a)",
+        "b) Algo",
+        [("c) Correcta", True)],
+        "d) Otra",
+    ],
+    # Fewer than four unlabeled answer lines
+    ["4. Una pregunta de una sola línea"],
+    ["5. ¿Es verdadera esta afirmación?", "Sí", "✔No"],
+    [
+        "6. ¿Cuál es el primer número natural?",
+        [("Uno", True)],
+        "Dos",
+        "Tres",
+    ],
+]
+
+
+def make_docx(path, blocks):
+    import docx
+    from docx.enum.text import WD_COLOR_INDEX
+
+    doc = docx.Document()
+    for i, block in enumerate(blocks):
+        if i and block[0] != "":
+            doc.add_paragraph("")
+        for paragraph in block:
+            if isinstance(paragraph, str):
+                doc.add_paragraph(paragraph)
+                continue
+            p = doc.add_paragraph()
+            for text, highlighted in paragraph:
+                run = p.add_run(text)
+                if highlighted:
+                    run.font.highlight_color = WD_COLOR_INDEX.YELLOW
+    doc.save(path)
+    return path
+
+
+def main():
+    make_docx(HERE / "edge_cases.docx", EDGE_CASES)
+    make_docx(HERE / "fixed.docx", FIXED_CASES)
+    make_question_bank(HERE / "synthetic.docx", n_questions=60, seed=8)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from doctomood import aio
+from doctomood.aio import AsyncConverter, convert_async
+from doctomood.ioutils import write_xml
+from doctomood.process import process_docx
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+
+
+@pytest.mark.parametrize("chunk_questions", [1, 7, 256])
+def test_to_xml_matches_write_xml(chunk_questions):
+    source = CORPUS / "synthetic.docx"
+    expected = io.BytesIO()
+    write_xml(process_docx(source, as_dataframe=False), expected)
+
+    converter = AsyncConverter(chunk_questions=chunk_questions)
+    assert asyncio.run(converter.to_xml(source)) == expected.getvalue()
+    assert asyncio.run(converter.to_xml(source.read_bytes())) == expected.getvalue()
+
+
+def test_convert_async():
+    bank = asyncio.run(convert_async(CORPUS / "edge_cases.docx"))
+    assert len(bank) == 16
+
+
+def test_concurrency_limit(monkeypatch):
+    lock = threading.Lock()
+    running = 0
+    most = 0
+
+    def convert(source, extra_content_words, answer_labels):
+        nonlocal running, most
+        with lock:
+            running += 1
+            most = max(most, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return source
+
+    monkeypatch.setattr(aio, "_convert", convert)
+
+    async def convert_all():
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            converter = AsyncConverter(max_concurrency=2, executor=executor)
+            return await asyncio.gather(*(converter.convert(i) for i in range(8)))
+
+    assert asyncio.run(convert_all()) == list(range(8))
+    assert most == 2
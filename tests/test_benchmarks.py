@@ -0,0 +1,30 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).parent.parent / "benchmarks"
+
+
+def load_benchmark(name):
+    spec = importlib.util.spec_from_file_location(name, BENCHMARKS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_bench_export_runs(monkeypatch, capsys):
+    bench_export = load_benchmark("bench_export")
+    df = bench_export.make_frame(10)
+    old = bench_export.iterrows_row_access(df)
+    new = bench_export.columnar_row_access(df)
+    assert [texts[1:] for texts, _ in old] == [list(texts[1:]) for texts, _ in new]
+    assert [highlight for _, highlight in old] == [
+        1 + correct if correct >= 0 else None for _, correct in new
+    ]
+
+    monkeypatch.setattr(sys, "argv", ["bench_export.py", "--rows", "10"])
+    bench_export.main()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "10 rows"
+    assert lines[1].startswith("row access")
+    assert lines[2].startswith("df_to_xml")
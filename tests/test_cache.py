@@ -0,0 +1,61 @@
+import os
+from pathlib import Path
+
+from doctomood.cache import QuestionCache
+
+
+def _sizes(cache):
+    return {entry.name: size for entry, size in cache._index().items()}
+
+
+def test_put_and_get(tmp_path):
+    cache = QuestionCache(tmp_path)
+    assert cache.get("a") is None
+    cache.put("a", [1, 2, 3])
+    assert cache.get("a") == [1, 2, 3]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = QuestionCache(tmp_path)
+    for key in "abc":
+        cache.put(key, "x" * 1000)
+    entry_size = _sizes(cache)["a.pkl"]
+    cache.max_bytes = 3 * entry_size
+    cache.get("a")
+    cache.put("d", "x" * 1000)
+    assert sorted(path.name for path in tmp_path.glob("*.pkl")) == [
+        "a.pkl",
+        "c.pkl",
+        "d.pkl",
+    ]
+    assert cache._total == 3 * entry_size
+
+
+def test_scans_the_directory_once(tmp_path, monkeypatch):
+    old = QuestionCache(tmp_path)
+    old.put("old", "x" * 1000)
+    os.utime(tmp_path / "old.pkl", (0, 0))
+
+    scans = []
+    glob = Path.glob
+
+    def counting_glob(self, pattern):
+        scans.append(pattern)
+        return glob(self, pattern)
+
+    monkeypatch.setattr(Path, "glob", counting_glob)
+    cache = QuestionCache(tmp_path, max_bytes=2500)
+    for key in "abcd":
+        cache.put(key, "x" * 1000)
+    assert len(scans) == 1
+    # The entry found by the scan is the least recently used one
+    assert not (tmp_path / "old.pkl").exists()
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = QuestionCache(tmp_path)
+    cache.put("a", [1])
+    (tmp_path / "a.pkl").write_bytes(b"not a pickle")
+    assert cache.get("a") is None
+    assert not (tmp_path / "a.pkl").exists()
+    assert "a.pkl" not in _sizes(cache)
@@ -0,0 +1,137 @@
+from pathlib import Path
+
+import pytest
+
+from doctomood.dedup import (
+    MAX_BUCKET,
+    _min_equal,
+    deduplicate,
+    find_duplicates,
+    question_signatures,
+)
+from doctomood.process import process_multiple
+from doctomood.questions import Question, QuestionBank
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+
+WORDS = [f"palabra{i}" for i in range(40)]
+
+
+def variant(*changes):
+    words = list(WORDS)
+    for i in changes:
+        words[i] = f"cambio{i}"
+    return " ".join(words)
+
+
+def bank_of(texts):
+    return QuestionBank(Question(text, ("sí", "no"), 0, "") for text in texts)
+
+
+# Each question is similar to the next one, but not to the one after it
+CHAIN = bank_of(
+    [
+        variant(),
+        variant(5),
+        variant(5, 20),
+        variant(5, 20, 35),
+        "una pregunta totalmente distinta sobre otra cosa",
+    ]
+)
+
+
+def test_chains_are_split_around_first_question():
+    assert find_duplicates(CHAIN, 0.75) == [[0, 1, 2, 3]]
+    # 1 and 2 are similar, but 2 is not similar to 0
+    assert find_duplicates(CHAIN, 0.83) == [[0, 1], [2, 3]]
+    assert find_duplicates(CHAIN, 0.9) == [[0, 1], [2, 3]]
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.75, 0.83])
+def test_cluster_members_are_similar_to_first(threshold):
+    bank = process_multiple([CORPUS / "synthetic.docx"], as_dataframe=False)
+    signatures, _ = question_signatures(bank)
+    clusters = find_duplicates(bank, threshold)
+    assert clusters
+    for first, *duplicates in clusters:
+        equal = (signatures[duplicates] == signatures[first]).sum(axis=1)
+        assert (equal >= _min_equal(threshold)).all()
+
+
+def test_large_bucket_is_one_cluster():
+    n = 4 * MAX_BUCKET
+    bank = bank_of([variant(i % 40) for i in range(n)] + ["otra pregunta"])
+    assert find_duplicates(bank) == [list(range(n))]
+
+
+def test_identical_questions():
+    bank = bank_of(["la misma pregunta"] * 3 + ["otra pregunta"])
+    assert find_duplicates(bank) == [[0, 1, 2]]
+    bank = bank_of(["otra pregunta", "la misma pregunta"] * 2)
+    assert find_duplicates(bank) == [[0, 2], [1, 3]]
+
+
+def test_no_duplicates():
+    bank = bank_of([f"pregunta número {i} sobre el tema {i * 7}" for i in range(50)])
+    assert find_duplicates(bank) == []
+    assert find_duplicates(QuestionBank()) == []
+
+
+def test_empty_questions_are_not_duplicates():
+    assert (
+        find_duplicates(QuestionBank(Question("", (), 0, "") for _ in range(3))) == []
+    )
+
+
+def test_drop_keeps_first_of_each_cluster():
+    bank, clusters = deduplicate(CHAIN, "drop", 0.9)
+    assert clusters == [[0, 1], [2, 3]]
+    assert bank.questions == [
+        CHAIN.questions[0],
+        CHAIN.questions[2],
+        CHAIN.questions[4],
+    ]
+
+
+def test_drop_keeps_questions_below_threshold():
+    bank, clusters = deduplicate(CHAIN, "drop", 0.83)
+    assert clusters == [[0, 1], [2, 3]]
+    assert bank.questions == [
+        CHAIN.questions[0],
+        CHAIN.questions[2],
+        CHAIN.questions[4],
+    ]
+
+
+def test_flag_names_first_of_cluster():
+    bank, _ = deduplicate(CHAIN, "flag", 0.83)
+    assert len(bank) == len(CHAIN)
+    assert bank.extra[0] == bank.extra[2] == bank.extra[4] == ""
+    assert bank.extra[1] == "Near-duplicate of question 1"
+    assert bank.extra[3] == "Near-duplicate of question 3"
+
+
+def test_process_multiple_returns_clusters(capsys):
+    paths = [CORPUS / "edge_cases.docx"] * 2
+    questions, clusters = process_multiple(
+        paths, as_dataframe=False, dedup="drop", return_clusters=True
+    )
+    assert capsys.readouterr().out == ""
+    assert len(questions) == len(clusters) == 16
+    assert all(len(cluster) == 2 for cluster in clusters)
+    # An explicit threshold is used as is
+    _, errors, clusters = process_multiple(
+        paths,
+        as_dataframe=False,
+        return_errors=True,
+        dedup="flag",
+        dedup_threshold=1.0,
+        return_clusters=True,
+    )
+    assert errors == []
+    assert len(clusters) == 16
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        deduplicate(CHAIN, "merge")
@@ -0,0 +1,194 @@
+import io
+import re
+import zipfile
+from pathlib import Path
+
+import docx
+import pytest
+from docx.enum.text import WD_COLOR_INDEX
+
+from doctomood.ioutils import (
+    DocxWriter,
+    ShardedWriter,
+    XmlWriter,
+    df_to_xml,
+    write_docx,
+    write_xml,
+)
+from doctomood.process import process_docx
+from doctomood.progress import Cancelled
+from doctomood.questions import Question, QuestionBank
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+
+
+@pytest.fixture(scope="module")
+def bank():
+    return process_docx(CORPUS / "edge_cases.docx", as_dataframe=False)
+
+
+def _previous_outputs(output_dir, stem):
+    paths = [output_dir / f"{stem}.docx", output_dir / f"{stem}.xml"]
+    for path in paths:
+        path.write_text("previous output")
+    return paths
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_cancelled_export_keeps_previous_outputs(tmp_path, bank, parallel):
+    paths = _previous_outputs(tmp_path, "questions_t")
+    with pytest.raises(Cancelled):
+        with ShardedWriter(tmp_path, "t", parallel=parallel) as writer:
+            writer.write_all(bank)
+            raise Cancelled
+    assert [path.read_text() for path in paths] == ["previous output"] * 2
+    assert sorted(tmp_path.iterdir()) == sorted(paths)
+
+
+def test_cancelled_by_progress_keeps_finished_shards(tmp_path, bank):
+    def progress(kind, n):
+        if len(writer.paths) == 2:
+            raise Cancelled
+
+    paths = _previous_outputs(tmp_path, "questions_t_002")
+    with pytest.raises(Cancelled):
+        with ShardedWriter(
+            tmp_path, "t", max_questions=10, progress=progress
+        ) as writer:
+            writer.write_all(bank)
+    assert [path.read_text() for path in paths] == ["previous output"] * 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "questions_t_001.docx",
+        "questions_t_001.xml",
+        "questions_t_002.docx",
+        "questions_t_002.xml",
+    ]
+    assert (tmp_path / "questions_t_001.xml").read_text().endswith("</quiz>")
+
+
+def test_complete_export_replaces_outputs(tmp_path, bank):
+    _previous_outputs(tmp_path, "questions_t")
+    with ShardedWriter(tmp_path, "t") as writer:
+        writer.write_all(bank)
+    xml = (tmp_path / "questions_t.xml").read_text(encoding="utf-8")
+    assert xml.count("<question ") == len(bank) and xml.endswith("</quiz>")
+    with zipfile.ZipFile(tmp_path / "questions_t.docx") as archive:
+        assert archive.testzip() is None
+
+
+@pytest.mark.parametrize("writer_class", [DocxWriter, XmlWriter])
+def test_writer_error_discards_output(tmp_path, bank, writer_class):
+    path = tmp_path / "out"
+    path.write_text("previous output")
+    with pytest.raises(RuntimeError):
+        with writer_class(path) as writer:
+            writer.write_all(bank)
+            raise RuntimeError
+    assert path.read_text() == "previous output"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.parametrize("output_class", [io.BytesIO, io.StringIO])
+def test_df_to_xml_return_text_to_file_object(bank, output_class):
+    expected = io.BytesIO()
+    write_xml(bank, expected)
+    output = output_class()
+    text = df_to_xml(bank, output, return_text=True)
+    assert text == expected.getvalue().decode("utf-8")
+    written = output.getvalue()
+    assert written == (text if output_class is io.StringIO else expected.getvalue())
+
+
+def test_df_to_xml_return_text_to_path(tmp_path, bank):
+    path = tmp_path / "questions.xml"
+    text = df_to_xml(bank, path, return_text=True)
+    assert path.read_text(encoding="utf-8") == text
+
+
+@pytest.mark.parametrize("batch", [None, 7])
+def test_shards_fit_max_bytes(tmp_path, batch):
+    bank = process_docx(CORPUS / "synthetic.docx", as_dataframe=False)
+    whole = io.BytesIO()
+    write_xml(bank, whole)
+    max_bytes = len(whole.getvalue()) // 5
+
+    with ShardedWriter(tmp_path, "t", max_bytes=max_bytes) as writer:
+        for start in range(0, len(bank), batch or len(bank)):
+            writer.write_all(bank[start : start + (batch or len(bank))])
+
+    assert len(writer.paths) > 5
+    numbers = []
+    for docx_path, xml_path in writer.paths:
+        data = xml_path.read_bytes()
+        assert len(data) <= max_bytes
+        numbers += map(int, re.findall(rb"<strong>(\d+)\.</strong>", data))
+        assert docx_path.exists()
+    # Questions are numbered across shards
+    assert numbers == list(range(1, len(bank) + 1))
+
+
+SPECIAL = QuestionBank(
+    [
+        Question("<b>Markup</b> & entities?", ("x < y", "a & b", '"q"', "'s'"), 1, ""),
+        Question("Tabs\tand\nline breaks", ("one\ttwo", "three\nfour", "", "ü"), 3, ""),
+        Question("No correct answer", ("a", "b", "c", "d"), -1, "Nota:\nline"),
+        Question("  Leading and trailing spaces  ", (" a", "b ", "c", "d"), 0, " "),
+        Question("Fewer answers", ("a", "b"), 1, "Explicación: extra"),
+    ]
+)
+
+
+def _python_docx_table(bank, output_path):
+    """The python-docx writer of df_to_docx() before DocxWriter."""
+    doc = docx.Document()
+    table = doc.add_table(rows=1, cols=6)
+    table.style = "Table Grid"
+    for cell, text in zip(
+        table.rows[0].cells, ["question", "A", "B", "C", "D", "extra"]
+    ):
+        cell.text = text
+    for i, answers in enumerate(bank.iter_answers()):
+        answers = list(answers) + [""] * (4 - len(answers))
+        cells = table.add_row().cells
+        for cell, text in zip(cells, [bank.questions[i], *answers, bank.extra[i]]):
+            cell.text = text
+        correct = bank.correct[i]
+        if correct >= 0:
+            for paragraph in cells[1 + correct].paragraphs:
+                for run in paragraph.runs:
+                    run.font.highlight_color = WD_COLOR_INDEX.YELLOW
+    doc.save(output_path)
+
+
+def _read_table(path):
+    """Return the (text, highlighted) of the cells of each row of a DOCX table."""
+    (table,) = docx.Document(path).tables
+    return [
+        [
+            (
+                cell.text,
+                any(
+                    run.font.highlight_color == WD_COLOR_INDEX.YELLOW
+                    for paragraph in cell.paragraphs
+                    for run in paragraph.runs
+                ),
+            )
+            for cell in row.cells
+        ]
+        for row in table.rows
+    ]
+
+
+@pytest.mark.parametrize("name", ["edge_cases", "synthetic", None])
+def test_docx_writer_matches_python_docx(tmp_path, name):
+    if name is None:
+        questions = SPECIAL
+    else:
+        questions = process_docx(CORPUS / f"{name}.docx", as_dataframe=False)
+    _python_docx_table(questions, tmp_path / "old.docx")
+    write_docx(questions, tmp_path / "new.docx")
+
+    old = _read_table(tmp_path / "old.docx")
+    assert len(old) == len(questions) + 1
+    assert any(highlighted for row in old for _, highlighted in row)
+    assert _read_table(tmp_path / "new.docx") == old
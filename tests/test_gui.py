@@ -0,0 +1,36 @@
+import queue
+import threading
+from pathlib import Path
+
+from doctomood.gui import DoctomoodGUI, duplicate_stems
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+
+
+def run_batch(paths, output_dir, jobs):
+    events = queue.Queue()
+    DoctomoodGUI.run_batch(
+        paths, output_dir, None, None, jobs, events, threading.Event()
+    )
+    return [events.get_nowait() for _ in range(events.qsize())]
+
+
+def test_duplicate_stems():
+    assert duplicate_stems(["x/a.docx", "x/b.docx", "y/c.odt"]) == []
+    assert duplicate_stems(["x/a.docx", "x/b.docx", "x/A.odt"]) == ["a.docx", "A.odt"]
+
+
+def test_run_batch(tmp_path):
+    events = run_batch([str(CORPUS / "edge_cases.docx")], tmp_path, 1)
+    assert ("file", 0, "Running") in events
+    kind, i, status, count, _ = events[-2]
+    assert (kind, i, status, count) == ("file", 0, "Done", 16)
+    assert events[-1] == ("batch_done", False)
+    assert (tmp_path / "questions_edge_cases.xml").exists()
+
+
+def test_run_batch_reports_pool_errors(tmp_path):
+    # An invalid worker count fails to start the pool
+    events = run_batch([str(CORPUS / "edge_cases.docx")], tmp_path, -1)
+    assert [event[0] for event in events] == ["batch_error", "batch_done"]
+    assert isinstance(events[0][1], ValueError)
@@ -0,0 +1,41 @@
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from doctomood.ioutils import BufferReader, iter_docx_with_highlight_mark
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+
+
+def test_buffer_reader_reads_like_bytesio():
+    data = bytearray(b"0123456789")
+    reader = BufferReader(data)
+    assert reader.read(3) == b"012"
+    assert reader.seek(-2, io.SEEK_END) == 8
+    assert reader.read() == b"89"
+    assert reader.seek(1) == 1
+    buffer = bytearray(4)
+    assert reader.readinto(buffer) == 4 and buffer == b"1234"
+
+
+def test_buffer_reader_negative_seek_raises_oserror():
+    reader = BufferReader(b"notazip")
+    with pytest.raises(OSError):
+        reader.seek(-15, io.SEEK_END)
+    assert reader.tell() == 0
+
+
+@pytest.mark.parametrize("data", [b"", b"notazip", b"x" * 21])
+def test_tiny_buffer_is_not_a_zip(data):
+    with pytest.raises(zipfile.BadZipFile):
+        list(iter_docx_with_highlight_mark(data))
+
+
+def test_read_docx_from_memory():
+    path = CORPUS / "edge_cases.docx"
+    data = path.read_bytes()
+    expected = list(iter_docx_with_highlight_mark(path))
+    assert list(iter_docx_with_highlight_mark(data)) == expected
+    assert list(iter_docx_with_highlight_mark(memoryview(data))) == expected
@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+SRC = Path(__file__).parents[1] / "src"
+
+
+def run_cli(*args, cwd):
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    return subprocess.run(
+        [sys.executable, "-m", "doctomood.main", *map(str, args)],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        check=True,
+    )
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        ["--profile", "--profile-json", "-"],
+        ["--dedup", "drop", "--dedup-report", "-"],
+    ],
+)
+def test_json_to_stdout(tmp_path, options):
+    docx = CORPUS / "edge_cases.docx"
+    result = run_cli(docx, docx, "-o", tmp_path, "--no-cache", *options, cwd=tmp_path)
+    report = json.loads(result.stdout)
+    assert report
+    assert "Saved Moodle XML file" in result.stderr
+    assert "\\u" not in result.stdout
+
+
+def _outputs(output_dir):
+    """Return the content of the output files, in name order (DOCX unzipped)."""
+    contents = []
+    for path in sorted(output_dir.iterdir()):
+        if path.suffix == ".docx":
+            with zipfile.ZipFile(path) as z:
+                contents.append({name: z.read(name) for name in z.namelist()})
+        else:
+            contents.append(path.read_bytes())
+    return contents
+
+
+@pytest.mark.parametrize("options", [[], ["--max-questions-per-file", "25"]])
+def test_stream_matches_non_stream(tmp_path, options):
+    inputs = [CORPUS / "edge_cases.docx", CORPUS / "synthetic.docx"]
+    outputs = []
+    for mode in [["--no-cache"], ["--stream"]]:
+        output_dir = tmp_path / mode[0].strip("-")
+        run_cli(*inputs, "-o", output_dir, *options, *mode, cwd=tmp_path)
+        outputs.append(_outputs(output_dir))
+    assert outputs[0]
+    assert outputs[0] == outputs[1]
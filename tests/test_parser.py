@@ -0,0 +1,54 @@
+import pytest
+
+from doctomood.parser import get_parser, get_serve_parser, parse_processing_config
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Write a config.yml in a temporary working directory."""
+    monkeypatch.chdir(tmp_path)
+
+    def write(text):
+        (tmp_path / "config.yml").write_text(text, encoding="utf-8")
+
+    return write
+
+
+def test_config_jobs_zero_means_all_cpus(config):
+    config("jobs: 0\n")
+    assert get_parser().parse_args(["in.docx"]).jobs is None
+
+
+def test_config_values_are_converted(config):
+    config("jobs: 3\nmax_bytes: 512K\ndedup_threshold: 0.9\n")
+    args = get_parser().parse_args(["in.docx"])
+    assert (args.jobs, args.max_bytes, args.dedup_threshold) == (3, 512 * 1024, 0.9)
+
+
+def test_config_serve_workers(config):
+    config("workers: 0\n")
+    assert get_serve_parser().parse_args([]).workers is None
+
+
+def test_command_line_overrides_config(config):
+    config("jobs: 0\n")
+    assert get_parser().parse_args(["in.docx", "--jobs", "2"]).jobs == 2
+
+
+def test_invalid_config_value(config, capsys):
+    config("jobs: -2\n")
+    with pytest.raises(SystemExit):
+        get_parser()
+    assert "invalid jobs in config.yml" in capsys.readouterr().err
+
+
+def test_processing_config(config):
+    config("jobs: 0\nanswer_labels: a-f\nextra_content_words: [nota]\n")
+    assert parse_processing_config() == {
+        "jobs": None,
+        "answer_labels": "a-f",
+        "extra_content_words": ["nota"],
+    }
+    config("jobs: many\n")
+    with pytest.raises(ValueError, match="invalid jobs in config.yml"):
+        parse_processing_config()
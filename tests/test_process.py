@@ -0,0 +1,112 @@
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from doctomood.process import (
+    AnswerPattern,
+    classify_block,
+    iter_question_batches,
+    iter_stream_files,
+    parse_answer_labels,
+    process,
+)
+from doctomood.questions import QuestionBank
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+
+
+@pytest.mark.parametrize(
+    "spec, labels",
+    [
+        ("a-d", ["a", "b", "c", "d"]),
+        ("1-3", ["1", "2", "3"]),
+        ("i-iv", ["i", "ii", "iii", "iv"]),
+        ("i-v", ["i", "ii", "iii", "iv", "v"]),
+        ("I-X", ["i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x"]),
+        ("i-l", ["i", "j", "k", "l"]),
+        ("a-b, x", ["a", "b", "x"]),
+    ],
+)
+def test_parse_answer_labels(spec, labels):
+    assert parse_answer_labels(spec) == labels
+
+
+@pytest.mark.parametrize("spec", ["d-a", "a-", "a-3", "a,,b"])
+def test_parse_invalid_answer_labels(spec):
+    with pytest.raises(ValueError):
+        parse_answer_labels(spec)
+
+
+def test_classify_roman_numeral_answers():
+    block = [
+        "1. ¿Cuál de estos números es par?",
+        "i) uno",
+        "ii) dos [HIGHLIGHTED]",
+        "iii) tres",
+        "iv) cinco",
+        "v) siete",
+        "Explicación: dos es divisible entre dos.",
+    ]
+    question = classify_block(block, answer_pattern=AnswerPattern("i-v"))
+    assert question.answers == ("uno", "dos", "tres", "cinco", "siete")
+    assert question.correct == 1
+    assert question.extra == "Explicación: dos es divisible entre dos."
+
+
+def _columns(bank):
+    return bank.questions, list(bank.iter_answers()), bank.correct, bank.extra
+
+
+def _paragraphs(name):
+    with open(CORPUS / f"{name}.paragraphs.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_parallel_classification_matches_serial():
+    paragraphs = _paragraphs("synthetic")
+    serial, serial_blocks = process(paragraphs, as_dataframe=False)
+    # 60 questions in chunks of 7, classified by two worker processes
+    parallel, blocks = process(paragraphs, as_dataframe=False, jobs=2, batch_size=7)
+    assert len(parallel) == 60
+    assert _columns(parallel) == _columns(serial)
+    assert blocks == serial_blocks
+
+
+@pytest.mark.parametrize(
+    "batch_size, sizes", [(1, [1] * 60), (7, [7] * 8 + [4]), (60, [60]), (100, [60])]
+)
+def test_question_batch_boundaries(batch_size, sizes):
+    paragraphs = _paragraphs("synthetic")
+    batches = list(iter_question_batches(paragraphs, batch_size=batch_size))
+    assert [len(bank) for bank in batches] == sizes
+    expected, _ = process(paragraphs, as_dataframe=False)
+    assert _columns(QuestionBank.concat(batches)) == _columns(expected)
+
+
+def test_stream_error_after_batches(tmp_path):
+    source = CORPUS / "synthetic.docx"
+    broken = tmp_path / "broken.docx"
+    # The document ends halfway through: the reader fails after some batches
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(broken, "w") as zout:
+        for info in zin.infolist():
+            data = zin.read(info)
+            if info.filename == "word/document.xml":
+                data = data[: len(data) // 2]
+            zout.writestr(info, data)
+
+    results = list(iter_stream_files([broken, source], batch_size=5))
+    paths = [path for path, _, _ in results]
+    assert paths == sorted(paths, key=[broken, source].index)
+    broken_results = results[: paths.count(broken)]
+    *batches, (_, bank, error) = broken_results
+    assert batches and all(error is None for _, _, error in batches)
+    assert bank is None and error is not None
+
+    expected, _ = process(_paragraphs("synthetic"), as_dataframe=False)
+    parsed = QuestionBank.concat(bank for _, bank, _ in batches)
+    assert _columns(parsed) == _columns(expected[: len(parsed)])
+    # The next file is parsed in full
+    rest = QuestionBank.concat(bank for _, bank, _ in results[len(broken_results) :])
+    assert _columns(rest) == _columns(expected)
@@ -0,0 +1,57 @@
+import pandas as pd
+
+from doctomood.questions import Question, QuestionBank
+
+
+def _bank():
+    return QuestionBank(
+        [
+            Question("Two answers", ("yes", "no"), 0, ""),
+            Question("Five answers", ("a", "b", "c", "d", "e"), 4, "note"),
+            Question("An empty answer", ("x", "", "z"), -1, ""),
+        ]
+    )
+
+
+def test_answers():
+    bank = _bank()
+    assert [bank.answers(i) for i in range(len(bank))] == [
+        ("yes", "no"),
+        ("a", "b", "c", "d", "e"),
+        ("x", "", "z"),
+    ]
+    assert bank.max_answers() == 5
+    assert list(bank[1:]) == list(_bank())[1:]
+
+
+def test_to_dataframe_missing_answers():
+    df = _bank().to_dataframe()
+    assert list(df.columns) == [
+        "question",
+        "ans0",
+        "ans1",
+        "ans2",
+        "ans3",
+        "ans4",
+        "correct",
+        "extra",
+    ]
+    assert df.loc[0, ["ans0", "ans1"]].tolist() == ["yes", "no"]
+    assert df.loc[0, ["ans2", "ans3", "ans4"]].isna().all()
+    # An empty answer is an empty string, not a missing value
+    assert df.loc[2, "ans1"] == ""
+    assert df.fillna("").loc[0, "ans4"] == ""
+
+
+def test_dataframe_round_trip():
+    bank = _bank()
+    assert list(QuestionBank.from_dataframe(bank.to_dataframe())) == list(bank)
+
+
+def test_from_dataframe_with_empty_string_padding():
+    # Empty strings are answers, which is why to_dataframe() pads with None
+    df = pd.DataFrame(
+        [["Q", "a", "b", "", "", 1, ""]],
+        columns=["question", "ans0", "ans1", "ans2", "ans3", "correct", "extra"],
+    )
+    assert QuestionBank.from_dataframe(df).answers(0) == ("a", "b", "", "")
@@ -0,0 +1,73 @@
+"""
+Compare the parser with the regression corpus in tests/data/regression,
+recorded with the parser as it was before the single-pass rewrite, and with
+the inputs whose output changed on purpose since then.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from doctomood.ioutils import (
+    get_docx_with_highlight_mark,
+    iter_docx_with_highlight_mark,
+)
+from doctomood.process import process, process_docx
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+NAMES = ["edge_cases", "synthetic"]
+# Recorded with the current parser, with the answers of each question as is
+FIXED = "fixed"
+
+
+def _load(name, kind):
+    with open(CORPUS / f"{name}.{kind}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _rows(bank, width=4):
+    """
+    Return the questions of a bank as in the corpus, with their answers
+    padded to width.
+    """
+    rows = []
+    for i, answers in enumerate(bank.iter_answers()):
+        rows.append(
+            {
+                "question": bank.questions[i],
+                "answers": list(answers) + [""] * (width - len(answers)),
+                "correct": bank.correct[i],
+                "extra": bank.extra[i],
+            }
+        )
+    return rows
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_read_paragraphs(name):
+    expected = _load(name, "paragraphs")
+    assert list(iter_docx_with_highlight_mark(CORPUS / f"{name}.docx")) == expected
+    assert get_docx_with_highlight_mark(CORPUS / f"{name}.docx") == expected
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_process_paragraphs(name):
+    bank, _ = process(_load(name, "paragraphs"), as_dataframe=False)
+    assert _rows(bank) == _load(name, "expected")
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_process_docx(name):
+    bank = process_docx(CORPUS / f"{name}.docx", as_dataframe=False)
+    assert _rows(bank) == _load(name, "expected")
+
+
+def test_read_fixed_paragraphs():
+    expected = _load(FIXED, "paragraphs")
+    assert list(iter_docx_with_highlight_mark(CORPUS / f"{FIXED}.docx")) == expected
+
+
+def test_process_fixed():
+    bank = process_docx(CORPUS / f"{FIXED}.docx", as_dataframe=False)
+    assert _rows(bank, width=0) == _load(FIXED, "expected")
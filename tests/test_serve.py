@@ -0,0 +1,73 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from doctomood.serve import Client, ConversionService, ServerError, make_server
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+MAX_UPLOAD = 100_000
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = ConversionService(workers=1, max_pending=1)
+    yield service
+    service.close()
+
+
+@pytest.fixture(scope="module")
+def client(service):
+    server = make_server(service, port=0, max_upload=MAX_UPLOAD)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield Client(f"http://127.0.0.1:{server.server_address[1]}", timeout=30)
+    server.shutdown()
+    server.server_close()
+
+
+def test_convert(client):
+    xml = client.convert(CORPUS / "edge_cases.docx")
+    assert xml.startswith(b"<quiz>") and xml.count(b"<question ") == 16
+
+
+def test_health(client):
+    assert client.health()["status"] == "ok"
+
+
+@pytest.mark.parametrize(
+    "data", [b"notazip", b"this is not a DOCX file, but it is long enough"]
+)
+def test_invalid_docx(client, data):
+    with pytest.raises(ServerError) as excinfo:
+        client.convert(data)
+    assert excinfo.value.status == 400
+
+
+def test_upload_too_large(client):
+    with pytest.raises(ServerError) as excinfo:
+        client.convert(bytes(MAX_UPLOAD + 1))
+    assert excinfo.value.status == 413
+
+
+def test_busy(client, service):
+    reserved = 0
+    while service.reserve():
+        reserved += 1
+    try:
+        with pytest.raises(ServerError) as excinfo:
+            client.convert(CORPUS / "edge_cases.docx")
+        assert excinfo.value.status == 503
+    finally:
+        for _ in range(reserved):
+            service.release()
+
+
+def test_recovers_from_a_crashed_worker(client, service):
+    crash = service._executor.submit(os._exit, 1)
+    with pytest.raises(Exception):
+        crash.result(timeout=30)
+    xml = client.convert(CORPUS / "edge_cases.docx")
+    assert xml.count(b"<question ") == 16
+    assert client.health()["restarts"] == 1
@@ -0,0 +1,29 @@
+import shutil
+from pathlib import Path
+
+from doctomood.watch import QuestionWatcher, write_outputs
+
+CORPUS = Path(__file__).parent / "data" / "regression"
+
+
+def test_outputs_are_not_watched(tmp_path):
+    shutil.copy(CORPUS / "edge_cases.docx", tmp_path / "a.docx")
+    docs_output = tmp_path / "questions_watch.docx"
+    xml_output = tmp_path / "questions_watch.xml"
+    watcher = QuestionWatcher(
+        [str(tmp_path / "*.docx")], exclude=[docs_output, xml_output]
+    )
+    watcher.update()
+    write_outputs(watcher.questions(), docs_output, xml_output)
+
+    assert list(watcher.snapshot()) == [str(tmp_path / "a.docx")]
+    assert watcher.changes(watcher.snapshot()) == ([], [])
+    assert len(watcher.questions()) == 16
+
+
+def test_exclude_matches_resolved_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "questions_watch.docx").touch()
+    (tmp_path / "b.docx").touch()
+    watcher = QuestionWatcher(["*.docx"], exclude=[tmp_path / "questions_watch.docx"])
+    assert list(watcher.snapshot()) == ["b.docx"]